@@ -0,0 +1,211 @@
+# Load test offline: bot dijalankan penuh (throttle, cache, render, backup HTML, antrean kirim)
+# terhadap API manifest tiruan dan Bot API tiruan di proses yang sama.
+# Hasil ditambahkan ke bench/results.jsonl agar bisa dibandingkan antar perubahan.
+#
+#   python3 bench/bench_load.py --updates 5000 --concurrency 256
+#   python3 bench/bench_load.py --synthetic-patches 200 --label "manifest besar"
+#   python3 bench/bench_load.py --history 10
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_FILE = os.path.join(BENCH_DIR, "results.jsonl")
+sys.path[:0] = [REPO_DIR, BENCH_DIR]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test bot dengan upstream dan Telegram tiruan")
+    parser.add_argument("--updates", type=int, default=2000, help="jumlah update sintetis")
+    parser.add_argument("--concurrency", type=int, default=128, help="update yang diproses bersamaan")
+    parser.add_argument("--chats", type=int, default=200, help="jumlah chat berbeda")
+    parser.add_argument("--upstream-latency", type=float, default=20.0, help="latensi API tiruan (ms)")
+    parser.add_argument("--synthetic-patches", type=int, default=0,
+                        help="ganti manifest GI dengan manifest sintetis berisi N patch")
+    parser.add_argument("--synthetic-parts", type=int, default=40, help="jumlah paket game manifest sintetis")
+    parser.add_argument("--poll", action="store_true", help="aktifkan poller latar belakang (jawab dari snapshot)")
+    parser.add_argument("--throttle", action="store_true", help="pakai throttle bawaan (default: nonaktif)")
+    parser.add_argument("--real-rates", action="store_true", help="pakai batas kirim Telegram yang asli")
+    parser.add_argument("--tracemalloc", action="store_true", help="ukur puncak heap Python (lebih lambat)")
+    parser.add_argument("--label", default="", help="catatan untuk hasil ini")
+    parser.add_argument("--no-save", action="store_true", help="jangan simpan ke results.jsonl")
+    parser.add_argument("--history", type=int, metavar="N", help="tampilkan N hasil terakhir lalu keluar")
+    return parser.parse_args()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_revision():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR,
+                               capture_output=True, text=True).stdout.strip()
+        return revision + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+# Konfigurasi bot lewat environment; harus dilakukan sebelum bot di-import
+def configure_environment(args, upstream_port, telegram_port):
+    os.environ.update({
+        "UPSTREAM_BASE_URL": f"http://127.0.0.1:{upstream_port}",
+        "TELEGRAM_BASE_URL": f"http://127.0.0.1:{telegram_port}",
+        "POLL_INTERVAL": "60" if args.poll else "0",
+        "METRICS_PORT": "0",
+        "API_PORT": "0",
+        "METRICS_LOG_INTERVAL": "0",
+        "LINK_CHECK_INTERVAL": "0",
+        "SNAPSHOT_FILE": "",
+        "HISTORY_DB": "history.sqlite3",
+        "SUBSCRIBERS_FILE": "subscribers.json",
+    })
+    if not args.throttle:
+        os.environ.update({"THROTTLE_USER_COOLDOWN": "0", "THROTTLE_CHAT_COOLDOWN": "0"})
+
+
+async def run(args, upstream_port, telegram_port):
+    from telegram import Update
+    import bot
+    from fake_telegram import FakeTelegram, synthetic_updates
+    from fake_upstream import FakeUpstream, endpoint_id, load_fixtures
+    from synthetic import make_manifest
+
+    payloads = load_fixtures()
+    if args.synthetic_patches:
+        manifest = make_manifest(game_parts=args.synthetic_parts, patches=args.synthetic_patches)
+        payloads[endpoint_id(bot.GAMES['gi'].endpoints['Global'])] = json.dumps(manifest).encode()
+
+    upstream = await FakeUpstream(payloads, port=upstream_port, latency=args.upstream_latency / 1000).start()
+    telegram = await FakeTelegram(port=telegram_port).start()
+    if not args.real_rates:
+        # Batas kirim dilonggarkan agar yang terukur adalah bot, bukan token bucket
+        bot.OUTBOUND = bot.OutboundScheduler(global_rate=1e9, private_rate=1e9, group_rate=1e9)
+
+    app = bot.build_application("123456:bench")
+    bot.register_handlers(app)
+    await app.initialize()
+    await bot.on_startup(app)
+
+    updates = [Update.de_json(data, app.bot) for data in synthetic_updates(args.updates, chats=args.chats)]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def drive(update):
+        async with semaphore:
+            started = time.perf_counter()
+            await app.process_update(update)
+            latencies.append(time.perf_counter() - started)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(drive(update) for update in updates))
+    elapsed = time.perf_counter() - started
+    heap_peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+    tracemalloc.stop()
+
+    await bot.on_shutdown(app)
+    await app.shutdown()
+    await telegram.stop()
+    await upstream.stop()
+
+    latencies.sort()
+    stats = bot.FETCH_STATS.stats()
+    return {
+        'updates': len(updates),
+        'elapsed_s': round(elapsed, 3),
+        'throughput': round(len(updates) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        'rss_max_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'heap_peak_mb': round(heap_peak / 1048576, 2) if heap_peak is not None else None,
+        'errors': sum(bot.HANDLER_ERRORS.values.values()),
+        'replies': len(telegram.replies),
+        'upstream_requests': stats['upstream_requests'],
+        'upstream_not_modified': upstream.not_modified,
+        'html_writes': bot.HTML_WRITER.writes,
+        'first_reply_s': round(bot.STARTUP.first_reply, 3) if bot.STARTUP.first_reply is not None else None,
+    }
+
+
+def load_results():
+    if not os.path.exists(RESULTS_FILE):
+        return []
+    with open(RESULTS_FILE) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def format_result(entry):
+    result = entry['result']
+    return (f"{entry['timestamp']} {entry['commit']:>14s}  {result['throughput']:9.1f} upd/s  "
+            f"p50={result['p50_ms']:8.2f}ms  p99={result['p99_ms']:8.2f}ms  "
+            f"rss={result['rss_max_mb']:7.1f}MB  {entry['label']}")
+
+
+# Fungsi untuk membandingkan dengan hasil terakhir yang memakai parameter sama
+def compare_with_previous(entry, previous_results):
+    same = [old for old in previous_results if old['params'] == entry['params']]
+    if not same:
+        return
+    old, new = same[-1]['result'], entry['result']
+    print(f"dibanding {same[-1]['commit']} ({same[-1]['timestamp']}): "
+          f"throughput {(new['throughput'] / old['throughput'] - 1) * 100:+.1f}%  "
+          f"p99 {(new['p99_ms'] / old['p99_ms'] - 1) * 100 if old['p99_ms'] else 0:+.1f}%")
+
+
+def main():
+    args = parse_args()
+    if args.history:
+        for entry in load_results()[-args.history:]:
+            print(format_result(entry))
+        return
+
+    upstream_port, telegram_port = free_port(), free_port()
+    configure_environment(args, upstream_port, telegram_port)
+    params = {name: value for name, value in vars(args).items() if name not in ('label', 'no_save', 'history')}
+
+    # Backup HTML, riwayat, dan file lain dari bot ditulis ke direktori sementara
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        result = asyncio.run(run(args, upstream_port, telegram_port))
+        os.chdir(REPO_DIR)
+
+    entry = {
+        'timestamp': datetime.now().isoformat(timespec="seconds"),
+        'commit': git_revision(),
+        'python': platform.python_version(),
+        'label': args.label,
+        'params': params,
+        'result': result,
+    }
+    print(json.dumps(result, indent=1))
+    print(format_result(entry))
+    compare_with_previous(entry, load_results())
+    if not args.no_save:
+        with open(RESULTS_FILE, "a") as file:
+            file.write(json.dumps(entry) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# Micro-benchmark renderer: pesan Telegram lama vs sekarang (waktu) dan export HTML lama vs
+# renderer streaming (puncak memori)
+# Jalankan: python3 bench/bench_render.py
+import os
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot
+from bot import format_size
+from synthetic import make_manifest
+
+
+# Implementasi lama (sebelum renderer streaming, disalin apa adanya) sebagai pembanding:
+# message += ... di dalam loop
+def legacy_build_message(title, manifest):
+    message = f"<b>{title} (MANUAL UPDATE)</b>\n\n"
+
+    # Full Installation
+    message += "- <b>Full Installation</b>\n"
+    for release in manifest.releases:
+        message += f" <b>Version {release.version}</b>\n"
+        for file in release.packages:
+            message += f"  <a href=\"{file.url}\">{file.type}</a> ({format_size(file.size)}) \n"
+        message += "\n"
+
+    # Old Patches
+    message += "- <b>Download From Patch</b>\n"
+    if manifest.old_patches:
+        for patch in manifest.old_patches:
+            message += f" <b>Version {patch.version}</b>\n"
+            for file in patch.game_pkgs + patch.audio_pkgs:
+                message += f"  <a href=\"{file.url}\">{file.type}</a> ({format_size(file.size)}) \n"
+            message += "\n"
+    else:
+        message += " No old patches available.\n\n"
+
+    # New Patches
+    message += "***********\n"
+    for patch in manifest.new_patches:
+        message += f" <b>Version {patch.version}</b>\n"
+        for file in patch.game_pkgs + patch.audio_pkgs:
+            message += f"  <a href=\"{file.url}\">{file.type}</a> ({format_size(file.size)}) \n"
+        message += "\n"
+
+    return message
+
+
+# HTML backup lama: seluruh isi dibangun di memori dengan html_content += ...
+def legacy_build_html(title, manifest):
+    html_content = "<html><body>"
+    html_content += f"<h1>{title} (MANUAL UPDATE)</h1>\n"
+
+    # Full Installation
+    html_content += "<h2>Full Installation</h2>\n"
+    if manifest.releases:
+        for release in manifest.releases:
+            html_content += f"<h3>Version {release.version}</h3>\n<ul>"
+            for file in release.packages:
+                html_content += f"<li><a href=\"{file.url}\">{file.type}</a> ({format_size(file.size)})</li>\n"
+            html_content += "</ul>"
+    else:
+        html_content += "<p>No data available for Full Installation.</p>\n"
+
+    # Patches
+    html_content += "<h2>Download From Patch</h2>\n"
+    if manifest.old_patches:
+        for patch in manifest.old_patches:
+            html_content += f"<h3>Version {patch.version}</h3>\n<ul>"
+            for file in patch.game_pkgs + patch.audio_pkgs:
+                html_content += f"<li><a href=\"{file.url}\">{file.type}</a> ({format_size(file.size)})</li>\n"
+            html_content += "</ul>"
+    else:
+        html_content += "<p>No old patches available.</p>\n"
+
+    html_content += "<h2>New Patches</h2>\n"
+    if manifest.new_patches:
+        for patch in manifest.new_patches:
+            html_content += f"<h3>Version {patch.version}</h3>\n<ul>"
+            for file in patch.game_pkgs + patch.audio_pkgs:
+                html_content += f"<li><a href=\"{file.url}\">{file.type}</a> ({format_size(file.size)})</li>\n"
+            html_content += "</ul>"
+    else:
+        html_content += "<p>No new patches available.</p>\n"
+
+    html_content += "</body></html>"
+    return html_content
+
+
+# Waktu terbaik (detik per panggilan) dua fungsi; dijalankan bergantian per putaran supaya
+# gangguan dari proses lain mengenai keduanya secara merata
+def best_times(first, second, number, rounds=9):
+    times = ([], [])
+    for _ in range(rounds):
+        for function, results in zip((first, second), times):
+            results.append(timeit.timeit(function, number=number) / number)
+    return min(times[0]), min(times[1])
+
+
+# Puncak memori (byte) saat menjalankan fungsi
+def peak_memory(function):
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+# Export HTML lama: seluruh isi dibangun di memori lalu ditulis sekaligus
+def legacy_save_html(title, manifest, file_path):
+    with open(file_path, "w") as file:
+        file.write(legacy_build_html(title, manifest))
+
+
+def main():
+    game = bot.GAMES['gi']
+    for patches, parts in ((2, 4), (50, 40), (400, 200)):
+        manifest = bot.parse_manifest(game, make_manifest(game_parts=parts, patches=patches))
+        title = bot.display_title(game, 'Global')
+        assert legacy_build_message(title, manifest) == bot.build_update_message(game, 'Global', manifest)
+        html_parts = []
+        bot.render_update(bot.HTML_TEMPLATE, title, manifest, html_parts.append)
+        assert legacy_build_html(title, manifest) == "".join(html_parts)
+
+        number = max(1, 2000 // patches)
+        legacy, current = best_times(
+            lambda: legacy_build_message(bot.display_title(game, 'Global'), manifest),
+            lambda: bot.build_update_message(game, 'Global', manifest),
+            number,
+        )
+        size = len(bot.build_update_message(game, 'Global', manifest))
+        print(f"patches={patches:4d} parts={parts:4d} size={size:9d}B  "
+              f"message: old={legacy * 1e3:8.3f}ms  current={current * 1e3:8.3f}ms  "
+              f"speedup={legacy / current:5.2f}x")
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "updates.html")
+            in_memory = peak_memory(lambda: legacy_save_html(title, manifest, file_path))
+            streamed = peak_memory(lambda: bot.save_to_html(game, 'Global', manifest, file_path=file_path))
+        print(f"{'':30s}html export peak memory: in-memory={in_memory / 1024:8.1f}KB  "
+              f"streamed={streamed / 1024:8.1f}KB")
+
+
+if __name__ == "__main__":
+    main()
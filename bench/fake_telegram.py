@@ -0,0 +1,172 @@
+# Server Bot API Telegram tiruan: menjawab panggilan bot dan mengirim update sintetis ke webhook.
+#
+# Contoh pengujian mode webhook secara lokal:
+#   python3 bench/fake_telegram.py --port 8081 --webhook http://127.0.0.1:8443/telegram --secret rahasia
+#   TELEGRAM_BASE_URL=http://127.0.0.1:8081 BOT_MODE=webhook WEBHOOK_SECRET=rahasia \
+#       WEBHOOK_URL=http://127.0.0.1:8443 BOT_TOKEN=123:fake python3 bot.py
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from urllib.parse import parse_qsl
+
+import httpx
+
+from stub_server import StubServer, json_response
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Hoyoverse Update", "username": "fake_update_bot"}
+
+
+# Fungsi untuk membuat update berisi command
+def command_update(update_id, chat_id, text):
+    command = text.split()[0]
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "group"},
+            "from": {"id": abs(chat_id), "is_bot": False, "first_name": f"user{abs(chat_id)}"},
+            "text": text,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(command)}],
+        },
+    }
+
+
+# Fungsi untuk membuat update berisi callback tombol inline
+def callback_update(update_id, chat_id, data, message_id=1):
+    user = {"id": abs(chat_id), "is_bot": False, "first_name": f"user{abs(chat_id)}"}
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": user,
+            "chat_instance": str(chat_id),
+            "data": data,
+            "message": {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "group"},
+                "from": BOT_USER,
+                "text": "Pilih server:",
+            },
+        },
+    }
+
+
+class FakeTelegram:
+    def __init__(self, port=0):
+        self.server = StubServer(self.handle, port=port)
+        self.calls = {}
+        self.replies = []
+        self.updates = asyncio.Queue()
+        self._message_ids = itertools.count(1000)
+
+    @property
+    def base_url(self):
+        return self.server.url
+
+    async def start(self):
+        await self.server.start()
+        return self
+
+    async def stop(self):
+        await self.server.stop()
+
+    # Fungsi untuk membaca parameter Bot API (JSON atau form)
+    @staticmethod
+    def parameters(headers, body):
+        if not body:
+            return {}
+        if headers.get("content-type", "").startswith("application/json"):
+            return json.loads(body)
+        return dict(parse_qsl(body.decode()))
+
+    async def handle(self, method, path, headers, body):
+        api_method = path.rsplit("/", 1)[-1]
+        self.calls[api_method] = self.calls.get(api_method, 0) + 1
+        params = self.parameters(headers, body)
+
+        if api_method == "getMe":
+            return json_response({"ok": True, "result": BOT_USER})
+        if api_method == "getUpdates":
+            return json_response({"ok": True, "result": await self.pending_updates(params)})
+        if api_method in ("sendMessage", "editMessageText"):
+            chat_id = int(params.get("chat_id", 0))
+            self.replies.append((time.monotonic(), chat_id, api_method, params.get("text", "")))
+            return json_response({"ok": True, "result": {
+                "message_id": int(params.get("message_id", next(self._message_ids))),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "group"},
+                "from": BOT_USER,
+                "text": params.get("text", ""),
+            }})
+        # setWebhook, deleteWebhook, answerCallbackQuery, answerInlineQuery, dll.
+        return json_response({"ok": True, "result": True})
+
+    # Untuk mode polling: kembalikan update yang menunggu (long-poll singkat)
+    async def pending_updates(self, params):
+        updates = []
+        try:
+            updates.append(await asyncio.wait_for(self.updates.get(), timeout=min(float(params.get("timeout", 1)), 1.0)))
+        except asyncio.TimeoutError:
+            return []
+        while not self.updates.empty() and len(updates) < 100:
+            updates.append(self.updates.get_nowait())
+        return updates
+
+
+# Fungsi untuk mengirim update ke webhook bot seperti yang dilakukan server Telegram
+async def post_updates(webhook_url, updates, secret=None, concurrency=32):
+    headers = {"X-Telegram-Bot-Api-Secret-Token": secret} if secret else {}
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(timeout=30) as client:
+        async def post(update):
+            async with semaphore:
+                response = await client.post(webhook_url, json=update, headers=headers)
+                return response.status_code
+        return await asyncio.gather(*(post(update) for update in updates))
+
+
+# Fungsi untuk membuat campuran update sintetis (command dan callback)
+def synthetic_updates(count, chats=50, start_id=1):
+    texts = ["/updateGI", "/updateZZZ", "/updateHSR", "/updatehonkai all"]
+    callbacks = ["honkai_Global", "honkai_Japan", "honkai_Korea", "honkai_Overseas", "honkai_Asia"]
+    updates = []
+    for index in range(count):
+        update_id = start_id + index
+        chat_id = 10_000 + index % chats
+        if index % 3 == 2:
+            updates.append(callback_update(update_id, chat_id, callbacks[index % len(callbacks)]))
+        else:
+            updates.append(command_update(update_id, chat_id, texts[index % len(texts)]))
+    return updates
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Server Bot API Telegram tiruan")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--webhook", help="URL webhook bot yang akan dikirimi update")
+    parser.add_argument("--secret", help="secret token webhook")
+    parser.add_argument("--updates", type=int, default=100)
+    parser.add_argument("--delay", type=float, default=3.0, help="jeda sebelum mengirim update (detik)")
+    args = parser.parse_args()
+
+    fake = await FakeTelegram(port=args.port).start()
+    print(f"Bot API tiruan berjalan di {fake.base_url}")
+    if args.webhook:
+        await asyncio.sleep(args.delay)
+        started = time.monotonic()
+        statuses = await post_updates(args.webhook, synthetic_updates(args.updates), secret=args.secret)
+        print(f"{len(statuses)} update dikirim dalam {time.monotonic() - started:.2f}s, status: "
+              f"{ {status: statuses.count(status) for status in set(statuses)} }")
+        await asyncio.sleep(args.delay)
+        print(f"Panggilan Bot API: {fake.calls}")
+    else:
+        await asyncio.Event().wait()
+    await fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,128 @@
+# Server API manifest tiruan yang menyajikan fixture rekaman (dengan ETag / 304 seperti upstream)
+#
+#   python3 bench/fake_upstream.py --record    # rekam ulang fixture dari API asli
+#   python3 bench/fake_upstream.py --offline   # tulis fixture sintetis dengan format yang sama
+#   python3 bench/fake_upstream.py --port 8082 # sajikan fixture, lalu jalankan bot dengan
+#                                              # UPSTREAM_BASE_URL=http://127.0.0.1:8082
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import bot
+from stub_server import StubServer
+from synthetic import make_manifest
+
+# Versi fixture sintetis per game (mode --offline)
+OFFLINE_VERSIONS = {'gi': "5.1.0", 'zzz': "1.3.0", 'hsr': "2.6.0", 'honkai': "7.8.0"}
+
+
+# Fungsi untuk mendapatkan id endpoint dari URL manifest (...game.php?id=<id>)
+def endpoint_id(url):
+    return parse_qs(urlsplit(url).query)['id'][0]
+
+
+def fixture_path(game, region):
+    return os.path.join(FIXTURE_DIR, f"{game.key}_{region.lower()}.json")
+
+
+# Fungsi untuk memuat semua fixture: id endpoint -> isi mentah (bytes)
+def load_fixtures(fixture_dir=FIXTURE_DIR):
+    payloads = {}
+    for game, region, url in bot.manifest_endpoints():
+        with open(os.path.join(fixture_dir, os.path.basename(fixture_path(game, region))), "rb") as file:
+            payloads[endpoint_id(url)] = file.read()
+    return payloads
+
+
+class FakeUpstream:
+    # payloads: id endpoint -> bytes; latency: jeda tiap respons (detik)
+    def __init__(self, payloads, port=0, latency=0.0):
+        self.payloads = payloads
+        self.latency = latency
+        self.not_modified = 0
+        self.server = StubServer(self.handle, port=port)
+
+    @property
+    def base_url(self):
+        return self.server.url
+
+    async def start(self):
+        await self.server.start()
+        return self
+
+    async def stop(self):
+        await self.server.stop()
+
+    async def handle(self, method, path, headers, body):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        query = parse_qs(urlsplit(path).query)
+        payload = self.payloads.get(query.get('id', [""])[0])
+        if payload is None:
+            return 404, {"Content-Type": "application/json"}, '{"retcode": -1, "message": "not found"}'
+        etag = '"%s"' % hashlib.sha1(payload).hexdigest()
+        if headers.get("if-none-match") == etag:
+            self.not_modified += 1
+            return 304, {"ETag": etag}, b""
+        return 200, {"Content-Type": "application/json", "ETag": etag}, payload
+
+
+# Fungsi untuk merekam fixture dari API asli
+async def record():
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    async with httpx.AsyncClient(timeout=30) as client:
+        for game, region, url in bot.manifest_endpoints():
+            response = await client.get(url)
+            response.raise_for_status()
+            data = response.json()
+            bot.parse_manifest(game, data)
+            write_fixture(game, region, data)
+
+
+# Fungsi untuk menulis fixture sintetis dengan format yang sama seperti API asli
+def write_offline_fixtures():
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for game, region, _ in bot.manifest_endpoints():
+        data = make_manifest(
+            version=OFFLINE_VERSIONS[game.key], game_parts=1 if game.key == 'honkai' else 4,
+            patches=2, pre_download=game.key == 'hsr', game=game.key,
+        )
+        write_fixture(game, region, data)
+
+
+def write_fixture(game, region, data):
+    with open(fixture_path(game, region), "w") as file:
+        json.dump(data, file, indent=1, sort_keys=True)
+    print(f"{game.key} {region}: {fixture_path(game, region)}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Server API manifest tiruan")
+    parser.add_argument("--port", type=int, default=8082)
+    parser.add_argument("--latency", type=float, default=0.0, help="jeda tiap respons (detik)")
+    parser.add_argument("--record", action="store_true", help="rekam fixture dari API asli")
+    parser.add_argument("--offline", action="store_true", help="tulis fixture sintetis")
+    args = parser.parse_args()
+
+    if args.record:
+        await record()
+    elif args.offline:
+        write_offline_fixtures()
+    else:
+        upstream = await FakeUpstream(load_fixtures(), port=args.port, latency=args.latency).start()
+        print(f"API manifest tiruan berjalan di {upstream.base_url}")
+        await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
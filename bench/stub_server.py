@@ -0,0 +1,70 @@
+# Server HTTP/1.1 minimal (asyncio, keep-alive) untuk server tiruan di benchmark dan pengujian lokal
+import asyncio
+import json
+
+REASONS = {200: "OK", 206: "Partial Content", 304: "Not Modified", 400: "Bad Request",
+           401: "Unauthorized", 404: "Not Found", 500: "Internal Server Error"}
+
+
+class StubServer:
+    # handler(method, path, headers, body) -> (status, headers, body) dan boleh berupa coroutine
+    def __init__(self, handler, host="127.0.0.1", port=0):
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self._server = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _serve(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                self.requests += 1
+
+                result = self.handler(method, path, headers, body)
+                if asyncio.iscoroutine(result):
+                    result = await result
+                status, response_headers, response_body = result
+                if isinstance(response_body, str):
+                    response_body = response_body.encode()
+                head = f"HTTP/1.1 {status} {REASONS.get(status, 'OK')}\r\n"
+                response_headers = dict(response_headers)
+                response_headers.setdefault("Content-Length", str(len(response_body)))
+                head += "".join(f"{name}: {value}\r\n" for name, value in response_headers.items())
+                writer.write(head.encode("latin-1") + b"\r\n" + (b"" if method == "HEAD" else response_body))
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # Koneksi keep-alive yang masih terbuka dibatalkan saat server berhenti
+            pass
+        finally:
+            writer.close()
+
+
+def json_response(payload, status=200, headers=None):
+    return status, {"Content-Type": "application/json", **(headers or {})}, json.dumps(payload)
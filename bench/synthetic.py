@@ -0,0 +1,55 @@
+# Generator manifest sintetis untuk benchmark (format sama dengan API upstream)
+import hashlib
+
+AUDIO_LANGS = ("zh-cn", "en-us", "ja-jp", "ko-kr")
+
+# Pola nama file per game agar label audio terdeteksi seperti pada data asli
+CLIENT_NAMES = {'gi': "GenshinImpact", 'zzz': "ZenlessZoneZero", 'hsr': "StarRail", 'honkai': "BH3"}
+FULL_AUDIO_NAMES = {
+    'gi': {"zh-cn": "Audio_Chinese", "en-us": "Audio_English(US)", "ja-jp": "Audio_Japanese", "ko-kr": "Audio_Korean"},
+    'zzz': {"zh-cn": "audio_zip_Cn", "en-us": "audio_zip_En", "ja-jp": "audio_zip_Jp", "ko-kr": "audio_zip_Kr"},
+    'hsr': {"zh-cn": "Chinese", "en-us": "English", "ja-jp": "Japanese", "ko-kr": "Korean"},
+}
+
+
+# md5 diturunkan dari URL: URL yang sama di region mana pun selalu punya md5 yang sama
+def package(url, size):
+    return {'url': url, 'size': str(size), 'md5': hashlib.md5(url.encode()).hexdigest()}
+
+
+def make_manifest(version="5.1.0", game_parts=4, patches=2, audio_langs=AUDIO_LANGS, pre_download=False, game='gi'):
+    audio_names = FULL_AUDIO_NAMES.get(game, {})
+    audio_langs = audio_langs if audio_names else ()
+    major = {
+        'version': version,
+        'game_pkgs': [
+            package(f"https://autopatch.example/client/{CLIENT_NAMES[game]}_{version}.zip.{index:03d}", 4_000_000_000 + index)
+            for index in range(1, game_parts + 1)
+        ],
+        'audio_pkgs': [
+            package(f"https://autopatch.example/client/{audio_names[lang]}_{version}.zip", 10_000_000_000 + index)
+            for index, lang in enumerate(audio_langs)
+        ],
+    }
+    minor = int(version.split('.')[1])
+    patch_list = []
+    for index in range(patches):
+        old_version = f"{version.split('.')[0]}.{max(minor - index - 1, 0)}.{index}"
+        patch_list.append({
+            'version': old_version,
+            'game_pkgs': [
+                package(f"https://autopatch.example/client/game_{old_version}_{version}_hdiff.zip", 800_000_000 + index)
+            ],
+            'audio_pkgs': [
+                package(f"https://autopatch.example/client/audio_{lang}_{old_version}_{version}_hdiff.zip", 90_000_000 + index)
+                for lang in audio_langs
+            ],
+        })
+    section = {'major': major, 'patches': patch_list}
+    game_package = {'main': section, 'pre_download': {}}
+    if pre_download:
+        game_package['pre_download'] = make_manifest(
+            version=f"{version.split('.')[0]}.{minor + 1}.0", game_parts=game_parts,
+            patches=patches, audio_langs=audio_langs, game=game,
+        )['data']['game_packages'][0]['main']
+    return {'retcode': 0, 'message': "OK", 'data': {'game_packages': [game_package]}}
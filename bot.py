@@ -1,9 +1,478 @@
 from telegram import Update
-from telegram.ext import Application, CommandHandler, CallbackContext, CallbackQueryHandler
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.ext import Application, CommandHandler, CallbackContext, CallbackQueryHandler, InlineQueryHandler
+from telegram.error import BadRequest, Forbidden, RetryAfter
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, InlineQueryResultArticle, InputTextMessageContent
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
-import requests
+from urllib.parse import unquote, urlsplit
+import argparse
+import asyncio
+import contextlib
+import difflib
+import functools
+import gzip
+import hashlib
+import heapq
+import httpx
+import itertools
+import json
+import logging
 import os
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+# Waktu mulai proses, untuk mengukur jeda sampai balasan pertama
+STARTED_AT = time.monotonic()
+
+logger = logging.getLogger(__name__)
+
+# Batas bucket histogram latensi (detik)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Fungsi untuk memformat label metrik dalam format teks Prometheus
+def format_labels(names, values, extra=""):
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+# Counter dengan label, contoh: METRIC.inc(game="gi", region="Global")
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        for key, value in sorted(self.values.items()):
+            yield f"{self.name}{format_labels(self.labels, key)} {value}"
+
+    def summary(self):
+        for key, value in sorted(self.values.items()):
+            yield f"{self.name}{format_labels(self.labels, key)}={value}"
+
+# Histogram dengan label; setiap nilai disimpan sebagai [jumlah per bucket..., total, count]
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, description, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.buckets = buckets
+        self.values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        series = self.values.get(key)
+        if series is None:
+            series = self.values[key] = [0] * len(self.buckets) + [0.0, 0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+                break
+        series[-2] += value
+        series[-1] += 1
+
+    # Ukur durasi blok "with" (tetap dicatat walaupun terjadi error)
+    @contextlib.contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        for key, series in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = format_labels(self.labels, key, 'le="%s"' % bound)
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = format_labels(self.labels, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {series[-1]}"
+            yield f"{self.name}_sum{format_labels(self.labels, key)} {series[-2]:.6f}"
+            yield f"{self.name}_count{format_labels(self.labels, key)} {series[-1]}"
+
+    def summary(self):
+        for key, series in sorted(self.values.items()):
+            average = series[-2] / series[-1] * 1000
+            yield f"{self.name}{format_labels(self.labels, key)} n={series[-1]} avg={average:.1f}ms"
+
+# Kumpulan metrik; statistik lain (cache, outbound, ...) ikut diekspor sebagai gauge
+class MetricsRegistry:
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, name, description, labels=()):
+        metric = Counter(f"{self.prefix}_{name}", description, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, description, labels=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(f"{self.prefix}_{name}", description, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    # collector() mengembalikan dict nama -> angka, diekspor sebagai <prefix>_[<group>_]<nama>
+    def collect(self, collector, group=""):
+        self.collectors.append((f"{self.prefix}_{group}_" if group else f"{self.prefix}_", collector))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        for prefix, collector in self.collectors:
+            for name, value in collector().items():
+                lines.append(f"# TYPE {prefix}{name} gauge")
+                lines.append(f"{prefix}{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        return [line for metric in self.metrics for line in metric.summary()]
+
+METRICS = MetricsRegistry("hoyobot")
+UPSTREAM_SECONDS = METRICS.histogram(
+    "upstream_request_seconds", "Latensi request ke API upstream", ("game", "region", "status"))
+PARSE_SECONDS = METRICS.histogram(
+    "parse_seconds", "Waktu decode dan parse manifest", ("game", "region"))
+RENDER_SECONDS = METRICS.histogram(
+    "render_seconds", "Waktu render pesan pembaruan (hanya saat isi berubah)", ("game", "region"))
+RENDER_CACHE = METRICS.counter(
+    "render_cache_total", "Hasil render dari cache (hit) atau dibuat ulang (miss)", ("game", "region", "result"))
+HTML_WRITE_SECONDS = METRICS.histogram(
+    "html_write_seconds", "Waktu menulis backup HTML", ("game", "region"))
+HTML_WRITE_ERRORS = METRICS.counter(
+    "html_write_errors_total", "Kegagalan menulis backup HTML", ("game", "region"))
+UPSTREAM_RETRIED = METRICS.counter(
+    "upstream_retries_total", "Percobaan ulang request upstream", ("game", "region"))
+UPSTREAM_REJECTED = METRICS.counter(
+    "upstream_circuit_rejections_total", "Request yang ditolak karena circuit terbuka", ("game", "region"))
+HANDLER_SECONDS = METRICS.histogram(
+    "handler_seconds", "Latensi handler command/callback", ("handler", "mode"))
+HANDLER_ERRORS = METRICS.counter(
+    "handler_errors_total", "Handler yang berakhir dengan error", ("handler",))
+API_REQUESTS = METRICS.counter(
+    "api_requests_total", "Permintaan ke API JSON lokal", ("view", "status"))
+
+# Konfigurasi koneksi ke API upstream
+HTTP_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0)
+MAX_UPSTREAM_CONCURRENCY = 8
+
+_http_client = None
+_upstream_semaphore = asyncio.Semaphore(MAX_UPSTREAM_CONCURRENCY)
+
+# Fungsi untuk mendapatkan client HTTP bersama (keep-alive)
+def get_http_client():
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        # httpx otomatis mengirim Accept-Encoding (gzip/deflate) dan mendekompresi respons
+        _http_client = httpx.AsyncClient(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS)
+    return _http_client
+
+# Validator HTTP (ETag / Last-Modified) terakhir per endpoint
+FetchValidators = namedtuple('FetchValidators', ['etag', 'last_modified', 'size'])
+
+_fetch_validators = {}
+
+# Statistik penghematan fetch: 304, payload yang tidak berubah, dan waktu parsing
+class FetchStats:
+    def __init__(self):
+        self.requests = 0
+        self.not_modified = 0
+        self.unchanged_payloads = 0
+        self.bytes_downloaded = 0
+        self.bytes_saved = 0
+        self.parses = 0
+        self.parse_seconds = 0.0
+
+    def record_parse(self, seconds):
+        self.parses += 1
+        self.parse_seconds += seconds
+
+    def stats(self):
+        skipped = self.not_modified + self.unchanged_payloads
+        average_parse = self.parse_seconds / self.parses if self.parses else 0.0
+        return {
+            'upstream_requests': self.requests,
+            'not_modified': self.not_modified,
+            'unchanged_payloads': self.unchanged_payloads,
+            'bytes_downloaded': self.bytes_downloaded,
+            'bytes_saved': self.bytes_saved,
+            'parse_ms_saved': round(skipped * average_parse * 1000, 1),
+        }
+
+FETCH_STATS = FetchStats()
+
+# Fungsi untuk mengambil isi mentah dari API tanpa memblokir event loop.
+# Mengembalikan (isi, validator baru); isi None jika server menjawab 304 (tidak berubah sejak
+# validator terakhir). Validator baru tidak disimpan di sini: pemanggil menyimpannya ke
+# _fetch_validators hanya setelah isi tersebut benar-benar dipakai (lihat manifest_loader).
+# labels (game, region) dipakai untuk metrik latensi upstream.
+async def fetch_payload(url, conditional=True, labels=None):
+    labels = labels or {'game': "", 'region': ""}
+    headers = {}
+    validators = _fetch_validators.get(url)
+    if conditional and validators is not None:
+        if validators.etag:
+            headers['If-None-Match'] = validators.etag
+        if validators.last_modified:
+            headers['If-Modified-Since'] = validators.last_modified
+
+    async with _upstream_semaphore:
+        started = time.perf_counter()
+        try:
+            response = await get_http_client().get(url, headers=headers)
+        except httpx.HTTPError:
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, status="error", **labels)
+            raise
+    UPSTREAM_SECONDS.observe(time.perf_counter() - started, status=response.status_code, **labels)
+    FETCH_STATS.requests += 1
+
+    if response.status_code == 304:
+        FETCH_STATS.not_modified += 1
+        FETCH_STATS.bytes_saved += validators.size
+        return None, validators
+    response.raise_for_status()
+
+    # Ukuran yang benar-benar terkirim lewat jaringan (sudah terkompresi jika ada)
+    downloaded = response.num_bytes_downloaded or len(response.content)
+    FETCH_STATS.bytes_downloaded += downloaded
+    return response.content, FetchValidators(
+        etag=response.headers.get('ETag'),
+        last_modified=response.headers.get('Last-Modified'),
+        size=downloaded,
+    )
+
+# Cache manifest per URL dengan TTL, stale-while-revalidate dan single-flight.
+# Data terakhir yang valid tidak pernah dibuang: jika pembaruan gagal atau terlalu lama,
+# data itu dipakai sebagai fallback (lihat degraded_age).
+class ManifestCache:
+    def __init__(self, ttl, stale_ttl, fallback_wait):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.fallback_wait = fallback_wait
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.fetches = 0
+        self.fallbacks = 0
+        self._entries = {}
+        self._inflight = {}
+        self._failing = set()
+        # Dipanggil (await on_store(key, value)) setelah data baru tersimpan; tidak dipanggil jika
+        # loader mengembalikan data yang sama atau gagal
+        self.on_store = None
+
+    async def get(self, key, loader):
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                return value
+            if age < self.ttl + self.stale_ttl:
+                # Data lama dikirim langsung, pembaruan berjalan di belakang
+                self.stale_hits += 1
+                self._refresh(key, loader)
+                return value
+        self.misses += 1
+        if key in self._inflight:
+            self.coalesced += 1
+        task = self._refresh(key, loader)
+        if entry is None:
+            return await asyncio.shield(task)
+        # Ada data lama: tunggu pembaruan sebentar saja, lalu pakai data terakhir yang valid.
+        # Pembaruan yang lambat belum tentu gagal; key hanya ditandai gagal oleh _load.
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), self.fallback_wait)
+        except Exception:
+            self.fallbacks += 1
+            return entry[0]
+
+    # Umur data (detik) jika pembaruan terakhir gagal dan data lama sedang dipakai, selain itu None
+    def degraded_age(self, key):
+        entry = self._entries.get(key)
+        if entry is None or key not in self._failing:
+            return None
+        return time.monotonic() - entry[1]
+
+    # Ambil data yang tersimpan tanpa mengubah statistik
+    def peek(self, key):
+        entry = self._entries.get(key)
+        return entry[0] if entry is not None else None
+
+    # Ambil data yang tersimpan tanpa melihat umur data
+    def snapshot(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self.hits += 1
+        return entry[0]
+
+    # Semua data tersimpan beserta umurnya (detik), untuk snapshot warm start
+    def export(self):
+        now = time.monotonic()
+        return [(key, value, now - fetched_at) for key, (value, fetched_at) in self._entries.items()]
+
+    # Pulihkan data dari snapshot; data yang sudah ada (lebih baru) tidak ditimpa
+    def restore(self, key, value, age):
+        self._entries.setdefault(key, (value, time.monotonic() - age))
+
+    # Paksa pengambilan ulang (dipakai oleh poller)
+    def refresh(self, key, loader):
+        return self._refresh(key, loader)
+
+    def _refresh(self, key, loader):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader))
+            task.add_done_callback(self._log_failure)
+            self._inflight[key] = task
+        return task
+
+    async def _load(self, key, loader):
+        try:
+            self.fetches += 1
+            previous = self._entries.get(key)
+            value = await loader()
+            self._entries[key] = (value, time.monotonic())
+            self._failing.discard(key)
+        except Exception:
+            self._failing.add(key)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        if self.on_store is not None and (previous is None or previous[0] is not value):
+            await self.on_store(key, value)
+        return value
+
+    @staticmethod
+    def _log_failure(task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Gagal memperbarui manifest: %r", task.exception())
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'fetches': self.fetches,
+            'fallbacks': self.fallbacks,
+            'failing': len(self._failing),
+            'entries': len(self._entries),
+        }
+
+MANIFEST_TTL = float(os.environ.get("MANIFEST_TTL", "60"))
+MANIFEST_STALE_TTL = float(os.environ.get("MANIFEST_STALE_TTL", "300"))
+# Lama menunggu pembaruan sebelum memakai data terakhir yang valid (detik)
+MANIFEST_FALLBACK_WAIT = 3.0
+MANIFEST_CACHE = ManifestCache(MANIFEST_TTL, MANIFEST_STALE_TTL, MANIFEST_FALLBACK_WAIT)
+
+# Retry upstream dengan backoff eksponensial + jitter, dibatasi total waktu per pembaruan
+UPSTREAM_RETRIES = int(os.environ.get("UPSTREAM_RETRIES", "2"))
+UPSTREAM_RETRY_BASE = 0.5
+UPSTREAM_RETRY_MAX = 4.0
+UPSTREAM_DEADLINE = 15.0
+
+# Circuit breaker per endpoint: terbuka setelah beberapa kegagalan berturut-turut
+BREAKER_THRESHOLD = 3
+BREAKER_RESET = float(os.environ.get("BREAKER_RESET", "60"))
+
+# Error upstream setelah retry habis, circuit terbuka, atau isi manifest tidak valid
+class UpstreamError(Exception):
+    pass
+
+class CircuitOpenError(UpstreamError):
+    pass
+
+# Circuit breaker: closed -> open (tolak langsung) -> setelah BREAKER_RESET satu percobaan (half-open)
+class CircuitBreaker:
+    def __init__(self, threshold, reset_timeout):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.rejected = 0
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            # Half-open: izinkan satu percobaan, yang lain tetap ditolak sampai hasilnya diketahui
+            self.opened_at = time.monotonic()
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+_breakers = {}
+
+def circuit_breaker(url):
+    breaker = _breakers.get(url)
+    if breaker is None:
+        breaker = _breakers[url] = CircuitBreaker(BREAKER_THRESHOLD, BREAKER_RESET)
+    return breaker
+
+def breaker_stats():
+    return {
+        'circuits_open': sum(breaker.is_open for breaker in _breakers.values()),
+        'circuit_rejections': sum(breaker.rejected for breaker in _breakers.values()),
+    }
+
+# Fungsi untuk menentukan apakah error upstream layak dicoba ulang
+def is_retryable(error):
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500 or error.response.status_code == 429
+    return isinstance(error, (httpx.TransportError, UpstreamError))
+
+# Jeda sebelum percobaan ke-attempt (1, 2, ...): eksponensial dengan jitter penuh
+def retry_delay(attempt):
+    return random.uniform(0, min(UPSTREAM_RETRY_MAX, UPSTREAM_RETRY_BASE * 2 ** (attempt - 1)))
+
+POLL_INTERVAL = float(os.environ.get("POLL_INTERVAL", "60"))
+POLL_JITTER = 0.1
+POLL_MAX_BACKOFF = 900.0
+
+# Fungsi untuk menutup client HTTP saat bot berhenti
+async def close_http_client(app):
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
 
 # Fungsi untuk memformat ukuran file
 def format_size(size):
@@ -19,748 +488,2676 @@ def format_size(size):
 def extract_filename(url, index):
     return f"Game Data #{index}"
 
-# Fungsi untuk mendapatkan data pembaruan game Genshin Impact
-def get_game_updates_gi():
-    url = "https://api.mazagung.id/game.php?id=gopR6Cufr3"
-    response = requests.get(url)
-    data = response.json()
+# Pengklasifikasi paket audio: satu regex untuk semua bahasa, dicompile sekali
+class AudioClassifier:
+    def __init__(self, *matchers):
+        self.labels = {f"lang{index}": label for index, (label, _) in enumerate(matchers)}
+        self.pattern = re.compile("|".join(
+            f"(?P<lang{index}>{re.escape(substring)})"
+            for index, (_, substring) in enumerate(matchers)
+        ))
+
+    def __call__(self, url):
+        match = self.pattern.search(url)
+        return self.labels[match.lastgroup] if match else "Unknown"
+
+PATCH_AUDIO = (
+    ("Audio CN", "audio_zh-cn"),
+    ("Audio US", "audio_en-us"),
+    ("Audio JP", "audio_ja-jp"),
+    ("Audio KR", "audio_ko-kr"),
+)
+
+# Alamat API manifest (bisa diganti ke server tiruan untuk benchmark)
+UPSTREAM_BASE_URL = os.environ.get("UPSTREAM_BASE_URL", "https://api.mazagung.id").rstrip("/")
+
+# Data game: endpoint per region, judul, command, dan pengenal audio
+Game = namedtuple('Game', ['key', 'title', 'command', 'endpoints', 'full_audio', 'patch_audio'])
+
+GAMES = {
+    'gi': Game(
+        key='gi',
+        title="GENSHIN IMPACT",
+        command="updateGI",
+        endpoints={'Global': f"{UPSTREAM_BASE_URL}/game.php?id=gopR6Cufr3"},
+        full_audio=AudioClassifier(
+            ("Audio CN", "Audio_Chinese_"),
+            ("Audio US", "Audio_English(US)_"),
+            ("Audio KR", "Audio_Korean_"),
+            ("Audio JP", "Audio_Japanese_"),
+        ),
+        patch_audio=AudioClassifier(*PATCH_AUDIO),
+    ),
+    'zzz': Game(
+        key='zzz',
+        title="ZENLESS ZONE ZERO",
+        command="updateZZZ",
+        endpoints={'Global': f"{UPSTREAM_BASE_URL}/game.php?id=U5hbdsT9W7"},
+        full_audio=AudioClassifier(
+            ("Audio CN", "audio_zip_Cn"),
+            ("Audio US", "audio_zip_En"),
+            ("Audio KR", "audio_zip_Kr"),
+            ("Audio JP", "audio_zip_Jp"),
+        ),
+        patch_audio=AudioClassifier(*PATCH_AUDIO),
+    ),
+    'hsr': Game(
+        key='hsr',
+        title="HONKAI STAR RAIL",
+        command="updateHSR",
+        endpoints={'Global': f"{UPSTREAM_BASE_URL}/game.php?id=4ziysqXOQ8"},
+        full_audio=AudioClassifier(
+            ("Audio CN", "Chinese"),
+            ("Audio US", "English"),
+            ("Audio KR", "Korean"),
+            ("Audio JP", "Japanese"),
+        ),
+        patch_audio=AudioClassifier(PATCH_AUDIO[0], ("Audio TW", "audio_zh-tw"), *PATCH_AUDIO[1:]),
+    ),
+    # Honkai Impact 3 tidak menampilkan paket audio
+    'honkai': Game(
+        key='honkai',
+        title="HONKAI IMPACT 3",
+        command="updatehonkai",
+        endpoints={
+            'Global': f"{UPSTREAM_BASE_URL}/game.php?id=5TIVvvcwtM",
+            'Japan': f"{UPSTREAM_BASE_URL}/game.php?id=g0mMIvshDb",
+            'Korea': f"{UPSTREAM_BASE_URL}/game.php?id=uxB4MC7nzC",
+            'Overseas': f"{UPSTREAM_BASE_URL}/game.php?id=bxPTXSET5t",
+            'Asia': f"{UPSTREAM_BASE_URL}/game.php?id=wkE5P5WsIf"
+        },
+        full_audio=None,
+        patch_audio=None,
+    ),
+}
 
-    full_installation_files = []
+# Daftar server Honkai Impact 3
+HONKAI_SERVERS = GAMES['honkai'].endpoints
+
+# Region khusus untuk tampilan gabungan semua server
+ALL_REGIONS = 'all'
+MAX_REGION_FANOUT = 5
+
+# Fungsi untuk mengecek apakah game memiliki lebih dari satu region
+def has_regions(game):
+    return len(game.endpoints) > 1
+
+# Fungsi untuk mendapatkan region bawaan sebuah game
+def default_region(game):
+    return next(iter(game.endpoints))
+
+# Fungsi untuk membuat judul game (dengan region jika ada)
+def display_title(game, region):
+    if region == ALL_REGIONS:
+        return f"{game.title} (Semua Server)"
+    return f"{game.title} ({region})" if has_regions(game) else game.title
+
+# Fungsi untuk menentukan lokasi file backup HTML
+def html_file_path(game, region):
+    return f"updates_{game.key}_{region}.html" if has_regions(game) else f"updates_{game.key}.html"
+
+# Fungsi untuk mendapatkan semua endpoint manifest yang dipantau
+def manifest_endpoints():
+    for game in GAMES.values():
+        for region, url in game.endpoints.items():
+            yield game, region, url
+
+# Model data paket yang ringkas dan tidak bisa diubah
+# md5 checksum dari upstream ("" jika tidak ada), dipakai oleh mode verify
+Package = namedtuple('Package', ['type', 'url', 'size', 'md5'], defaults=("",))
+Patch = namedtuple('Patch', ['version', 'game_pkgs', 'audio_pkgs'])
+Release = namedtuple('Release', ['version', 'packages'])
+Manifest = namedtuple('Manifest', [
+    'releases', 'old_patches', 'new_patches', 'has_updates', 'content_hash', 'latest_version', 'upgrade_steps',
+])
+# Satu langkah upgrade untuk /plan: full install (from_version None) atau patch from_version -> to_version
+UpgradeStep = namedtuple('UpgradeStep', ['from_version', 'to_version', 'game_pkgs', 'audio_pkgs', 'pre_download'])
+
+VERSION_PART_PATTERN = re.compile(r"\d+")
+
+# Fungsi untuk mengubah teks versi menjadi tuple angka yang bisa dibandingkan ("4.10.0" > "4.9.0");
+# nol di akhir diabaikan agar "5.1" == "5.1.0"
+def parse_version(version):
+    parts = [int(part) for part in VERSION_PART_PATTERN.findall(version or "")]
+    while parts and parts[-1] == 0:
+        parts.pop()
+    return tuple(parts)
+
+# Fungsi untuk menghitung hash isi mentah manifest
+def payload_hash(body):
+    return hashlib.sha1(body).hexdigest()
+
+# Fungsi untuk menghitung hash manifest yang sudah di-decode
+def manifest_hash(data):
+    return payload_hash(json.dumps(data, sort_keys=True, separators=(',', ':')).encode())
+
+# Fungsi untuk mem-parsing paket full installation menjadi (paket game, paket audio)
+def parse_full_packages(game, major):
+    game_pkgs = tuple(
+        Package(extract_filename(game_pkg['url'], index), game_pkg['url'], int(game_pkg['size']), game_pkg.get('md5', ""))
+        for index, game_pkg in enumerate(major.get('game_pkgs', []), start=1)
+    )
+    audio_pkgs = tuple(
+        Package(game.full_audio(audio_pkg['url']), audio_pkg['url'], int(audio_pkg['size']), audio_pkg.get('md5', ""))
+        for audio_pkg in major.get('audio_pkgs', [])
+    ) if game.full_audio is not None else ()
+    return game_pkgs, audio_pkgs
+
+# Fungsi untuk mem-parsing satu patch
+def parse_patch(game, patch):
+    return Patch(
+        version=patch['version'],
+        game_pkgs=tuple(
+            Package('Game Data', game_pkg['url'], int(game_pkg['size']), game_pkg.get('md5', ""))
+            for game_pkg in patch.get('game_pkgs', [])
+        ),
+        audio_pkgs=tuple(
+            Package(game.patch_audio(audio_pkg['url']), audio_pkg['url'], int(audio_pkg['size']), audio_pkg.get('md5', ""))
+            for audio_pkg in patch.get('audio_pkgs', [])
+        ) if game.patch_audio is not None else ()
+    )
+
+# Fungsi untuk mengumpulkan langkah upgrade dari bagian main dan pre-download
+def parse_upgrade_steps(game, main, pre_download):
+    steps = []
+    for section, is_pre_download in ((main, False), (pre_download, True)):
+        major = section.get('major') or {}
+        if not major.get('version'):
+            continue
+        steps.append(UpgradeStep(None, major['version'], *parse_full_packages(game, major), is_pre_download))
+        for patch in section.get('patches') or []:
+            patch_data = parse_patch(game, patch)
+            steps.append(UpgradeStep(
+                patch['version'], major['version'], patch_data.game_pkgs, patch_data.audio_pkgs, is_pre_download
+            ))
+    return tuple(steps)
+
+# Fungsi untuk mem-parsing manifest game menjadi daftar paket
+def parse_manifest(game, data, content_hash=None):
+    releases = []
     old_patches = []
     new_patches = []
 
     pre_download = data['data']['game_packages'][0].get('pre_download', {})
     main = data['data']['game_packages'][0].get('main', {})
-    
+
     major = pre_download.get('major', {}) or main.get('major', {})
     patches = pre_download.get('patches', []) or main.get('patches', [])
 
     # Full Installation
     if major:
-        version = major['version']
-        game_pkgs = major.get('game_pkgs', [])
-        for index, game_pkg in enumerate(game_pkgs, start=1):
-            filename = extract_filename(game_pkg['url'], index)
-            full_installation_files.append({
-                'type': filename,
-                'version': version,
-                'url': game_pkg['url'],
-                'size': format_size(game_pkg['size'])
-            })
-
-        for audio_pkg in major.get('audio_pkgs', []):
-            audio_type = "Unknown"
-            if "Audio_Chinese_" in audio_pkg['url']:
-                audio_type = "Audio CN"
-            elif "Audio_English(US)_" in audio_pkg['url']:
-                audio_type = "Audio US"
-            elif "Audio_Korean_" in audio_pkg['url']:
-                audio_type = "Audio KR"
-            elif "Audio_Japanese_" in audio_pkg['url']:
-                audio_type = "Audio JP"
-
-            full_installation_files.append({
-                'type': audio_type,
-                'version': version,
-                'url': audio_pkg['url'],
-                'size': format_size(audio_pkg['size'])
-            })
+        game_pkgs, audio_pkgs = parse_full_packages(game, major)
+        releases.append(Release(major['version'], game_pkgs + audio_pkgs))
+
+    # Versi terbaru; jika tidak ada data major, gunakan versi patch tertinggi
+    latest_version = major.get('version') or max((patch['version'] for patch in patches), key=parse_version, default='')
+    latest = parse_version(latest_version)
 
     # Patches
-    for patch in patches:
-        patch_data = {
-            'version': patch['version'],
-            'game_pkgs': [
-                {
-                    'type': 'Game Data',
-                    'url': game_pkg['url'],
-                    'size': format_size(game_pkg['size'])
-                }
-                for game_pkg in patch.get('game_pkgs', [])
-            ],
-            'audio_pkgs': [
-                {
-                    'type': "Audio CN" if "audio_zh-cn" in audio_pkg['url'] else
-                            "Audio US" if "audio_en-us" in audio_pkg['url'] else
-                            "Audio JP" if "audio_ja-jp" in audio_pkg['url'] else
-                            "Audio KR" if "audio_ko-kr" in audio_pkg['url'] else
-                            "Unknown",
-                    'url': audio_pkg['url'],
-                    'size': format_size(audio_pkg['size'])
-                }
-                for audio_pkg in patch.get('audio_pkgs', [])
-            ]
-        }
-        if patch['version'] < major.get('version', ''):
+    for patch in sorted(patches, key=lambda patch: parse_version(patch['version']), reverse=True):
+        patch_data = parse_patch(game, patch)
+        if parse_version(patch['version']) < latest:
             old_patches.append(patch_data)
         else:
             new_patches.append(patch_data)
 
-    return full_installation_files, old_patches, new_patches, bool(major or patches)
-
-# Fungsi untuk menyimpan pembaruan ke file HTML Genshin Impact
-def save_to_html_gi(full_installation_files, old_patches, new_patches, file_path="updates_gi.html"):
-    html_content = "<html><body>"
-    html_content += "<h1>GENSHIN IMPACT (MANUAL UPDATE)</h1>\n"
+    return Manifest(
+        releases=tuple(releases),
+        old_patches=tuple(old_patches),
+        new_patches=tuple(new_patches),
+        has_updates=bool(major or patches),
+        content_hash=content_hash or manifest_hash(data),
+        latest_version=latest_version,
+        upgrade_steps=parse_upgrade_steps(game, main, pre_download or {}),
+    )
+
+# Isi mentah manifest terakhir per URL (disimpan di snapshot warm start)
+_manifest_payloads = {}
+
+# Fungsi untuk membuat loader yang mengambil lalu mem-parsing manifest,
+# dengan retry dan circuit breaker per endpoint
+def manifest_loader(game, region):
+    url = game.endpoints[region]
+    labels = {'game': game.key, 'region': region}
+    breaker = circuit_breaker(url)
+
+    # Mengembalikan (manifest, isi mentah baru atau None, validator)
+    async def load_once(previous):
+        body, validators = await fetch_payload(url, conditional=previous is not None, labels=labels)
+        if body is None:
+            return previous, None, validators
+
+        # Payload yang sama persis tidak perlu di-decode, di-parse, atau di-render ulang
+        content_hash = payload_hash(body)
+        if previous is not None and previous.content_hash == content_hash:
+            FETCH_STATS.unchanged_payloads += 1
+            return previous, None, validators
+
+        started = time.perf_counter()
+        try:
+            data = json.loads(body)
+            result = parse_manifest(game, data, content_hash)
+        except (ValueError, LookupError, TypeError, AttributeError) as error:
+            raise UpstreamError(f"Manifest tidak valid: {error!r}") from error
+        elapsed = time.perf_counter() - started
+        FETCH_STATS.record_parse(elapsed)
+        PARSE_SECONDS.observe(elapsed, **labels)
+        return result, body, validators
+
+    async def loader():
+        if not breaker.allow():
+            UPSTREAM_REJECTED.inc(**labels)
+            raise CircuitOpenError(f"Circuit terbuka untuk {game.key} {region}")
+        previous = MANIFEST_CACHE.peek(url)
+        deadline = time.monotonic() + UPSTREAM_DEADLINE
+        attempt = 0
+        while True:
+            try:
+                result, body, validators = await asyncio.wait_for(load_once(previous), deadline - time.monotonic())
+            except (httpx.HTTPError, UpstreamError, asyncio.TimeoutError) as error:
+                attempt += 1
+                delay = retry_delay(attempt)
+                if attempt > UPSTREAM_RETRIES or not is_retryable(error) or time.monotonic() + delay > deadline:
+                    breaker.record_failure()
+                    # Pengambilan berikutnya tanpa If-None-Match, agar tidak terjebak 304 ke data lama
+                    _fetch_validators.pop(url, None)
+                    if isinstance(error, UpstreamError):
+                        raise
+                    raise UpstreamError(f"Gagal mengambil manifest: {error!r}") from error
+                UPSTREAM_RETRIED.inc(**labels)
+                await asyncio.sleep(delay)
+            else:
+                breaker.record_success()
+                # Validator dan isi mentah disimpan bersama manifestnya: ManifestCache._load menyimpan
+                # hasil loader tanpa await di antaranya, jadi keduanya tidak bisa berbeda versi
+                _fetch_validators[url] = validators
+                if body is not None:
+                    _manifest_payloads[url] = body
+                return result
+    return loader
+
+MANIFEST_ENDPOINTS = {url: (game, region) for game, region, url in manifest_endpoints()}
+
+# Efek samping manifest baru (notifikasi, riwayat, verifikasi link). Dipanggil ManifestCache setelah
+# manifest tersimpan, jadi tidak jalan untuk hasil yang dibuang karena deadline dan tidak diulang saat retry.
+async def manifest_stored(url, manifest):
+    game, region = MANIFEST_ENDPOINTS[url]
+    detect_manifest_change(game, region, json.loads(_manifest_payloads[url]))
+    await record_history(game, region, manifest)
+    LINK_VERIFIER.wake()
+
+MANIFEST_CACHE.on_store = manifest_stored
+
+# Fungsi untuk mendapatkan data pembaruan game lewat cache
+async def get_game_updates(game, region):
+    url = game.endpoints[region]
+    # Jika poller aktif, jawab langsung dari snapshot di memori
+    if POLL_INTERVAL > 0:
+        snapshot = MANIFEST_CACHE.snapshot(url)
+        if snapshot is not None:
+            return snapshot
+    return await MANIFEST_CACHE.get(url, manifest_loader(game, region))
+
+# Fungsi poller untuk memperbarui satu endpoint secara berkala
+async def poll_endpoint(game, region):
+    url = game.endpoints[region]
+    loader = manifest_loader(game, region)
+    failures = 0
+    while True:
+        try:
+            await MANIFEST_CACHE.refresh(url, loader)
+            failures = 0
+            delay = POLL_INTERVAL
+        except Exception as error:
+            failures += 1
+            delay = min(POLL_INTERVAL * 2 ** failures, POLL_MAX_BACKOFF)
+            logger.warning("Gagal mengambil %s (percobaan ke-%d): %r", url, failures, error)
+        await asyncio.sleep(delay * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER))
+
+# Template render HTML backup (header dan version berupa fungsi yang sudah di-compile; baris file
+# dibentuk dari file_start/file_end di render_files). Isinya ditulis bertahap ke file sehingga
+# seluruh HTML tidak pernah ada di memori; pesan Telegram dibuat terpisah (build_update_message).
+UpdateTemplate = namedtuple('UpdateTemplate', [
+    'header', 'section_full', 'no_full', 'section_old', 'no_old', 'section_new', 'no_new',
+    'version', 'file_start', 'file_end', 'version_end', 'footer',
+])
+
+HTML_TEMPLATE = UpdateTemplate(
+    header=lambda title: f"<html><body><h1>{title} (MANUAL UPDATE)</h1>\n",
+    section_full="<h2>Full Installation</h2>\n",
+    no_full="<p>No data available for Full Installation.</p>\n",
+    section_old="<h2>Download From Patch</h2>\n",
+    no_old="<p>No old patches available.</p>\n",
+    section_new="<h2>New Patches</h2>\n",
+    no_new="<p>No new patches available.</p>\n",
+    version=lambda version: f"<h3>Version {version}</h3>\n<ul>",
+    file_start="<li><a href=\"",
+    file_end="</li>\n",
+    version_end="</ul>",
+    footer="</body></html>",
+)
+
+# Fungsi untuk membuat baris-baris file; diformat langsung di sini (tanpa fungsi per file)
+# karena ini bagian terpanas dari render
+def render_files(template, packages):
+    start, end = template.file_start, template.file_end
+    return "".join([f"{start}{file.url}\">{file.type}</a> ({format_size(file.size)}){end}" for file in packages])
+
+# Fungsi untuk menulis satu kelompok versi beserta daftar filenya
+def render_version(template, version, packages, write):
+    write(template.version(version))
+    write(render_files(template, packages))
+    write(template.version_end)
+
+# Fungsi renderer: menulis potongan output ke write (list.append, file.write, dll)
+def render_update(template, title, manifest, write):
+    write(template.header(title))
 
     # Full Installation
-    html_content += "<h2>Full Installation</h2>\n"
-    if full_installation_files:
-        grouped_files = {}
-        for file in full_installation_files:
-            version = file['version']
-            if version not in grouped_files:
-                grouped_files[version] = []
-            grouped_files[version].append(file)
-
-        for version, files in grouped_files.items():
-            html_content += f"<h3>Version {version}</h3>\n<ul>"
-            for file in files:
-                html_content += f"<li><a href=\"{file['url']}\">{file['type']}</a> ({file['size']})</li>\n"
-            html_content += "</ul>"
-    else:
-        html_content += "<p>No data available for Full Installation.</p>\n"
-
-    # Patches
-    html_content += "<h2>Download From Patch</h2>\n"
-    if old_patches:
-        for patch in old_patches:
-            html_content += f"<h3>Version {patch['version']}</h3>\n<ul>"
-            for file in patch['game_pkgs']:
-                html_content += f"<li><a href=\"{file['url']}\">{file['type']}</a> ({file['size']})</li>\n"
-            for file in patch['audio_pkgs']:
-                html_content += f"<li><a href=\"{file['url']}\">{file['type']}</a> ({file['size']})</li>\n"
-            html_content += "</ul>"
-    else:
-        html_content += "<p>No old patches available.</p>\n"
-
-    html_content += "</body></html>"
-
-    with open(file_path, "w") as file:
-        file.write(html_content)
-
-# Fungsi command untuk menampilkan pembaruan Genshin Impact
-async def update_gi_command(update: Update, context: CallbackContext):
-    full_installation_files, old_patches, new_patches, has_updates = get_game_updates_gi()
-
-    if has_updates:
-        save_to_html_gi(full_installation_files, old_patches, new_patches)
-        message = "<b>GENSHIN IMPACT (MANUAL UPDATE)</b>\n\n"
-
-        # Full Installation
-        message += "- <b>Full Installation</b>\n"
-        grouped_files = {}
-        for file in full_installation_files:
-            version = file['version']
-            if version not in grouped_files:
-                grouped_files[version] = []
-            grouped_files[version].append(file)
-
-        for version, files in grouped_files.items():
-            message += f" <b>Version {version}</b>\n"
-            for file in files:
-                message += f"  <a href=\"{file['url']}\">{file['type']}</a> ({file['size']}) \n"
+    write(template.section_full)
+    for release in manifest.releases:
+        render_version(template, release.version, release.packages, write)
+    if not manifest.releases:
+        write(template.no_full)
+
+    # Old Patches
+    write(template.section_old)
+    for patch in manifest.old_patches:
+        render_version(template, patch.version, patch.game_pkgs + patch.audio_pkgs, write)
+    if not manifest.old_patches:
+        write(template.no_old)
+
+    # New Patches
+    write(template.section_new)
+    for patch in manifest.new_patches:
+        render_version(template, patch.version, patch.game_pkgs + patch.audio_pkgs, write)
+    if not manifest.new_patches:
+        write(template.no_new)
+
+    write(template.footer)
+
+# Batas panjang pesan Telegram; sisa ruang dipakai untuk waktu update, nomor halaman,
+# dan peringatan data fallback
+MESSAGE_LIMIT = 4096
+MESSAGE_PAGE_LIMIT = MESSAGE_LIMIT - 200
+
+# Hasil render pesan (sudah dibagi per halaman) yang disimpan per isi manifest
+# dan status link (links = LINK_VERIFIER.generation saat render)
+RenderedUpdate = namedtuple('RenderedUpdate', ['content_hash', 'pages', 'timestamped', 'links'])
+
+_rendered_updates = {}
+
+# Pesan Telegram dibangun di memori dengan += seperti build_message lama: CPython menambah string
+# yang hanya dipegang satu variabel di tempat, lebih cepat daripada list + join atau renderer
+# streaming untuk pesan sebesar ini (lihat bench/bench_render.py)
+def message_header(title):
+    return f"<b>{title} (MANUAL UPDATE)</b>\n\n"
+
+# Fungsi untuk menambahkan bagian-bagian pesan (judul, kelompok versi, teks jika kosong) ke message.
+# Kelompok versi berupa (version, note, packages); link bermasalah diberi tanda ⚠️.
+# Semua bagian ditulis di satu fungsi supaya message tidak disalin ulang per bagian.
+def render_message_sections(message, sections):
+    notes = LINK_VERIFIER.notes
+    for heading, groups, empty in sections:
+        message += heading
+        for version, note, packages in groups:
+            message += f" <b>Version {version}</b>{note}\n"
+            if notes:
+                for file in packages:
+                    message += f"  <a href=\"{file.url}\">{file.type}</a> ({format_size(file.size)}){notes.get(file.url, '')} \n"
+            else:
+                for file in packages:
+                    message += f"  <a href=\"{file.url}\">{file.type}</a> ({format_size(file.size)}) \n"
             message += "\n"
-
-        # Old Patches
-        message += "- <b>Download From Patch</b>\n"
-        if old_patches:
-            for patch in old_patches:
-                message += f" <b>Version {patch['version']}</b>\n"
-                for file in patch['game_pkgs']:
-                    message += f"  <a href=\"{file['url']}\">{file['type']}</a> ({file['size']}) \n"
-                for file in patch['audio_pkgs']:
-                    message += f"  <a href=\"{file['url']}\">{file['type']}</a> ({file['size']}) \n"
-                message += "\n"
-        else:
-            message += " No old patches available.\n\n"
-
-        # New Patches
-        message += "***********\n"
-        if new_patches:
-            for patch in new_patches:
-                message += f" <b>Version {patch['version']}</b>\n"
-                for file in patch['game_pkgs']:
-                    message += f"  <a href=\"{file['url']}\">{file['type']}</a> ({file['size']}) \n"
-                for file in patch['audio_pkgs']:
-                    message += f"  <a href=\"{file['url']}\">{file['type']}</a> ({file['size']}) \n"
-                message += "\n"
+        if not groups:
+            message += empty
+    return message
+
+# Fungsi untuk membuat baris-baris file tanpa judul versi (dipakai pesan /plan)
+def render_message_files(packages):
+    notes = LINK_VERIFIER.notes
+    return "".join([
+        f"  <a href=\"{file.url}\">{file.type}</a> ({format_size(file.size)}){notes.get(file.url, '')} \n"
+        for file in packages
+    ])
+
+# Fungsi untuk membuat pesan Telegram dari manifest (tanpa waktu update terakhir)
+def build_update_message(game, region, manifest):
+    return render_message_sections(message_header(display_title(game, region)), [
+        ("- <b>Full Installation</b>\n", [(release.version, "", release.packages) for release in manifest.releases], ""),
+        ("- <b>Download From Patch</b>\n", [
+            (patch.version, "", patch.game_pkgs + patch.audio_pkgs) for patch in manifest.old_patches
+        ], " No old patches available.\n\n"),
+        ("***********\n", [
+            (patch.version, "", patch.game_pkgs + patch.audio_pkgs) for patch in manifest.new_patches
+        ], ""),
+    ])
+
+# Fungsi untuk membagi pesan panjang per baris (semua tag HTML ditutup di baris yang sama),
+# sebisa mungkin di batas kelompok versi (baris kosong)
+def paginate_message(text, limit=MESSAGE_PAGE_LIMIT):
+    pages = []
+    lines = []
+    length = 0
+    boundary = 0
+    for line in text.splitlines(keepends=True):
+        # Setelah dipotong di batas kelompok, sisa baris yang terbawa ditambah baris ini
+        # bisa masih melebihi batas; potong lagi (kali ini seluruhnya) sebelum menambah baris
+        while lines and length + len(line) > limit:
+            cut = boundary or len(lines)
+            pages.append("".join(lines[:cut]))
+            lines = lines[cut:]
+            length = sum(map(len, lines))
+            boundary = 0
+        lines.append(line)
+        length += len(line)
+        if line == "\n":
+            boundary = len(lines)
+    if lines or not pages:
+        pages.append("".join(lines))
+    return tuple(pages)
+
+# Fungsi untuk mendapatkan hasil render, hanya dibuat ulang jika isi manifest berubah
+def render_manifest(game, region, manifest):
+    rendered = _rendered_updates.get((game.key, region))
+    if (rendered is not None and rendered.content_hash == manifest.content_hash
+            and rendered.links == LINK_VERIFIER.generation):
+        RENDER_CACHE.inc(game=game.key, region=region, result="hit")
+        return rendered
+    RENDER_CACHE.inc(game=game.key, region=region, result="miss")
+    with RENDER_SECONDS.time(game=game.key, region=region):
+        rendered = RenderedUpdate(
+            content_hash=manifest.content_hash,
+            pages=paginate_message(build_update_message(game, region, manifest)),
+            timestamped=not manifest.new_patches,
+            links=LINK_VERIFIER.generation,
+        )
+    _rendered_updates[(game.key, region)] = rendered
+    return rendered
+
+# Fungsi untuk memformat umur data, misalnya "5 menit"
+def format_age(seconds):
+    if seconds < 60:
+        return f"{int(seconds)} detik"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} menit"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)} jam"
+    return f"{int(seconds // 86400)} hari"
+
+# Fungsi untuk membuat peringatan jika pesan memakai data terakhir karena API bermasalah
+def fallback_notice(game, region):
+    regions = game.endpoints if region == ALL_REGIONS else (region,)
+    ages = {
+        name: age for name in regions
+        if (age := MANIFEST_CACHE.degraded_age(game.endpoints[name])) is not None
+    }
+    if not ages:
+        return ""
+    servers = f" ({', '.join(ages)})" if has_regions(game) else ""
+    return f"⚠️ Server API{servers} sedang bermasalah, data terakhir dari {format_age(max(ages.values()))} lalu.\n\n"
+
+# Fungsi untuk mendapatkan teks satu halaman pesan dari hasil render
+def update_message_text(rendered, page=0, notice=""):
+    text = rendered.pages[page]
+    last_page = len(rendered.pages) - 1
+    if rendered.timestamped and page == last_page:
+        current_time = datetime.now().strftime("%d-%m-%Y %H:%M:%S")
+        text += f"Update terakhir pada: {current_time}\n\n"
+    text += notice
+    if last_page > 0:
+        text += f"<i>Halaman {page + 1}/{last_page + 1}</i>"
+    return text
+
+# Fungsi untuk membuat tombol navigasi halaman (dan tombol kembali untuk game dengan region)
+def update_reply_markup(game, region, rendered, page=0):
+    keyboard = []
+    navigation = []
+    if page > 0:
+        navigation.append(InlineKeyboardButton("◀️ Sebelumnya", callback_data=f"page_{game.key}_{region}_{page - 1}"))
+    if page < len(rendered.pages) - 1:
+        navigation.append(InlineKeyboardButton("Berikutnya ▶️", callback_data=f"page_{game.key}_{region}_{page + 1}"))
+    if navigation:
+        keyboard.append(navigation)
+    if has_regions(game):
+        keyboard.append([InlineKeyboardButton("🔙 Kembali", callback_data=f"{game.key}_back")])
+    return InlineKeyboardMarkup(keyboard) if keyboard else None
+
+# Fungsi untuk menyimpan pembaruan ke file HTML secara atomik (file sementara lalu rename)
+def save_to_html(game, region, manifest, file_path=None):
+    file_path = file_path or html_file_path(game, region)
+    temp_path = f"{file_path}.tmp"
+    with open(temp_path, "w") as file:
+        render_update(HTML_TEMPLATE, display_title(game, region), manifest, file.write)
+    os.replace(temp_path, file_path)
+
+# Penulis backup HTML di luar event loop; satu worker agar penulisan tidak saling tumpang tindih
+class HtmlBackupWriter:
+    def __init__(self):
+        self.writes = 0
+        self.skipped = 0
+        self._exported = {}
+        self._pending = {}
+        self._queue = asyncio.Queue()
+        self._worker = None
+
+    def submit(self, game, region, manifest):
+        file_path = html_file_path(game, region)
+        pending = self._pending.get(file_path)
+        latest_hash = pending[2].content_hash if pending else self._exported.get(file_path)
+        # Lewati jika isi manifest sama dengan yang terakhir diekspor
+        if latest_hash == manifest.content_hash:
+            self.skipped += 1
+            return
+        self._pending[file_path] = (game, region, manifest)
+        if pending is None:
+            self._queue.put_nowait(file_path)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            file_path = await self._queue.get()
+            game, region, manifest = self._pending.pop(file_path)
+            try:
+                with HTML_WRITE_SECONDS.time(game=game.key, region=region):
+                    await asyncio.to_thread(save_to_html, game, region, manifest, file_path)
+                self._exported[file_path] = manifest.content_hash
+                self.writes += 1
+            except OSError as error:
+                HTML_WRITE_ERRORS.inc(game=game.key, region=region)
+                logger.warning("Gagal menyimpan %s: %r", file_path, error)
+            except Exception:
+                # Error lain (render, encoding) tidak boleh menghentikan worker
+                HTML_WRITE_ERRORS.inc(game=game.key, region=region)
+                logger.exception("Gagal membuat backup HTML %s", file_path)
+            finally:
+                self._queue.task_done()
+
+    def stats(self):
+        return {'html_writes': self.writes, 'html_skipped': self.skipped}
+
+    async def stop(self):
+        if self._worker is not None:
+            await self._queue.join()
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+
+HTML_WRITER = HtmlBackupWriter()
+
+# Fungsi untuk mengambil data lalu membuat hasil render pembaruan (None jika tidak ada data)
+async def render_game_updates(game, region):
+    manifest = await get_game_updates(game, region)
+    if not manifest.has_updates:
+        return None
+    HTML_WRITER.submit(game, region, manifest)
+    return render_manifest(game, region, manifest)
+
+# Fungsi untuk mengambil manifest semua region secara bersamaan (dibatasi MAX_REGION_FANOUT)
+async def get_all_region_updates(game):
+    semaphore = asyncio.Semaphore(MAX_REGION_FANOUT)
+
+    async def fetch(region):
+        async with semaphore:
+            return await get_game_updates(game, region)
+
+    results = await asyncio.gather(*(fetch(region) for region in game.endpoints), return_exceptions=True)
+    return dict(zip(game.endpoints, results))
+
+# Fungsi untuk mengelompokkan versi dengan link dan ukuran paket yang sama di beberapa region
+# (md5 dan nama paket boleh berbeda); hasil: (version, url dan size) -> [packages, regions]
+def collapse_regions(manifests):
+    sections = {'full': {}, 'old': {}, 'new': {}}
+    for region, manifest in manifests.items():
+        groups = [('full', release.version, release.packages) for release in manifest.releases]
+        groups += [('old', patch.version, patch.game_pkgs + patch.audio_pkgs) for patch in manifest.old_patches]
+        groups += [('new', patch.version, patch.game_pkgs + patch.audio_pkgs) for patch in manifest.new_patches]
+        for section, version, packages in groups:
+            key = (version, tuple((package.url, package.size) for package in packages))
+            sections[section].setdefault(key, [packages, []])[1].append(region)
+    return sections
+
+# Fungsi untuk membuat pesan perbandingan semua region
+def build_all_regions_message(game, results):
+    manifests = {
+        region: manifest for region, manifest in results.items()
+        if not isinstance(manifest, BaseException) and manifest.has_updates
+    }
+    sections = collapse_regions(manifests)
+    message = message_header(display_title(game, ALL_REGIONS)) + "- <b>Versi per Server</b>\n"
+    for region, manifest in results.items():
+        if isinstance(manifest, BaseException):
+            message += f" {region}: <i>gagal mengambil data</i>\n"
         else:
-            current_time = datetime.now().strftime("%d-%m-%Y %H:%M:%S")
-            message += f"Update terakhir pada: {current_time}\n\n"
+            version = manifest.releases[0].version if manifest.releases else "-"
+            message += f" {region}: <b>{version}</b>\n"
+    message += "\n"
+
+    def groups(section):
+        return [
+            (version, f" <i>({'semua server' if len(regions) == len(game.endpoints) else ', '.join(regions)})</i>", packages)
+            for (version, _), (packages, regions) in sections[section].items()
+        ]
 
-        await update.message.reply_text(message, parse_mode="HTML")
-    else:
-        await update.message.reply_text(
-            "Tidak ada pembaruan tersedia saat ini.",
-            parse_mode="HTML"
+    message = render_message_sections(message, [
+        ("- <b>Full Installation</b>\n", groups('full'), ""),
+        ("- <b>Download From Patch</b>\n", groups('old'), " No old patches available.\n\n"),
+        ("***********\n", groups('new'), ""),
+    ])
+    return message, bool(sections['new'])
+
+# Fungsi untuk membuat hasil render gabungan semua region (disimpan per isi manifest)
+async def render_all_regions(game):
+    results = await get_all_region_updates(game)
+    content_hash = hashlib.sha1("".join(
+        getattr(manifest, 'content_hash', 'error') for manifest in results.values()
+    ).encode()).hexdigest()
+
+    rendered = _rendered_updates.get((game.key, ALL_REGIONS))
+    if rendered is not None and rendered.content_hash == content_hash and rendered.links == LINK_VERIFIER.generation:
+        RENDER_CACHE.inc(game=game.key, region=ALL_REGIONS, result="hit")
+        return rendered
+    RENDER_CACHE.inc(game=game.key, region=ALL_REGIONS, result="miss")
+    with RENDER_SECONDS.time(game=game.key, region=ALL_REGIONS):
+        message, has_new_patches = build_all_regions_message(game, results)
+        rendered = RenderedUpdate(
+            content_hash=content_hash,
+            pages=paginate_message(message),
+            timestamped=not has_new_patches,
+            links=LINK_VERIFIER.generation,
         )
-
-# Fungsi untuk mendapatkan data pembaruan game Zenless Zone Zero
-def get_game_updates_zzz():
-    url = "https://api.mazagung.id/game.php?id=U5hbdsT9W7"
-    response = requests.get(url)
-    data = response.json()
-
-    full_installation_files = []
-    old_patches = []
-    new_patches = []
-
-    pre_download = data['data']['game_packages'][0].get('pre_download', {})
-    main = data['data']['game_packages'][0].get('main', {})
-    
-    major = pre_download.get('major', {}) or main.get('major', {})
-    patches = pre_download.get('patches', []) or main.get('patches', [])
-
-    # Full Installation
-    if major:
-        version = major['version']
-        game_pkgs = major.get('game_pkgs', [])
-        for index, game_pkg in enumerate(game_pkgs, start=1):
-            filename = extract_filename(game_pkg['url'], index)
-            full_installation_files.append({
-                'type': filename,
-                'version': version,
-                'url': game_pkg['url'],
-                'size': format_size(game_pkg['size'])
-            })
-
-        for audio_pkg in major.get('audio_pkgs', []):
-            audio_type = "Unknown"
-            if "audio_zip_Cn" in audio_pkg['url']:
-                audio_type = "Audio CN"
-            elif "audio_zip_En" in audio_pkg['url']:
-                audio_type = "Audio US"
-            elif "audio_zip_Kr" in audio_pkg['url']:
-                audio_type = "Audio KR"
-            elif "audio_zip_Jp" in audio_pkg['url']:
-                audio_type = "Audio JP"
-
-            full_installation_files.append({
-                'type': audio_type,
-                'version': version,
-                'url': audio_pkg['url'],
-                'size': format_size(audio_pkg['size'])
-            })
-
-    # Patches
-    for patch in patches:
-        patch_data = {
-            'version': patch['version'],
-            'game_pkgs': [
-                {
-                    'type': 'Game Data',
-                    'url': game_pkg['url'],
-                    'size': format_size(game_pkg['size'])
-                }
-                for game_pkg in patch.get('game_pkgs', [])
-            ],
-            'audio_pkgs': [
-                {
-                    'type': "Audio CN" if "audio_zh-cn" in audio_pkg['url'] else
-                            "Audio US" if "audio_en-us" in audio_pkg['url'] else
-                            "Audio JP" if "audio_ja-jp" in audio_pkg['url'] else
-                            "Audio KR" if "audio_ko-kr" in audio_pkg['url'] else
-                            "Unknown",
-                    'url': audio_pkg['url'],
-                    'size': format_size(audio_pkg['size'])
-                }
-                for audio_pkg in patch.get('audio_pkgs', [])
-            ]
-        }
-        if patch['version'] < major.get('version', ''):
-            old_patches.append(patch_data)
+    _rendered_updates[(game.key, ALL_REGIONS)] = rendered
+    return rendered
+
+# Fungsi untuk membuat hasil render satu region atau gabungan semua region
+async def render_updates(game, region):
+    if region == ALL_REGIONS:
+        return await render_all_regions(game)
+    return await render_game_updates(game, region)
+
+# Verifikasi link paket di latar belakang: HEAD (atau GET Range 0-0 jika HEAD tidak didukung)
+# untuk setiap URL di manifest, ukuran dari server dibandingkan dengan size di manifest.
+# Hasil disimpan per URL selama LINK_CHECK_TTL; link bermasalah ditandai di pesan (lihat render_message_sections).
+LINK_CHECK_INTERVAL = float(os.environ.get("LINK_CHECK_INTERVAL", "900"))
+LINK_CHECK_TTL = float(os.environ.get("LINK_CHECK_TTL", "21600"))
+LINK_CHECK_CONCURRENCY = int(os.environ.get("LINK_CHECK_CONCURRENCY", "8"))
+LINK_CHECK_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+# Error jaringan tidak dianggap link mati, hanya dicoba lagi setelah jeda ini (detik)
+LINK_CHECK_RETRY = 300.0
+CONTENT_RANGE_PATTERN = re.compile(r"bytes\s+\S+/(\d+)")
+
+# problem: None = belum diketahui, "" = normal, selain itu keterangan masalah
+LinkStatus = namedtuple('LinkStatus', ['problem', 'expires_at'])
+
+# Fungsi untuk mengumpulkan semua URL paket di manifest beserta ukurannya
+def manifest_links(manifest):
+    links = {package[3]: package[4] for package in manifest_packages(manifest)}
+    for step in manifest.upgrade_steps:
+        links.update((file.url, file.size) for file in step.game_pkgs + step.audio_pkgs)
+    return links
+
+# Fungsi untuk membaca ukuran file dari respons HEAD / GET Range (None jika tidak diketahui)
+def remote_size(response):
+    if response.status_code == 206:
+        match = CONTENT_RANGE_PATTERN.match(response.headers.get('Content-Range', ""))
+        return int(match.group(1)) if match else None
+    length = response.headers.get('Content-Length')
+    return int(length) if length and length.isdigit() else None
+
+class LinkVerifier:
+    def __init__(self, ttl, concurrency):
+        self.ttl = ttl
+        self.concurrency = concurrency
+        # Naik setiap ada link yang berubah status; hasil render lama jadi tidak berlaku
+        self.generation = 0
+        self.probes = 0
+        self.errors = 0
+        self.runs = 0
+        # Tanda ⚠️ siap pakai untuk link yang bermasalah saja (url -> teks), dibaca saat render pesan
+        self.notes = {}
+        self._results = {}
+        self._client = None
+        self._wakeup = asyncio.Event()
+
+    def get_client(self):
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=LINK_CHECK_TIMEOUT, follow_redirects=True,
+                limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # Fungsi untuk memeriksa satu link; mengembalikan keterangan masalah atau ""
+    async def probe(self, url, size):
+        client = self.get_client()
+        response = await client.head(url)
+        if response.status_code in (403, 405, 501) or (response.status_code < 400 and remote_size(response) is None):
+            # Sebagian CDN menolak HEAD: minta 1 byte saja, body tidak dibaca
+            async with client.stream("GET", url, headers={'Range': "bytes=0-0"}) as response:
+                pass
+        if response.status_code >= 400:
+            return f"link mati ({response.status_code})"
+        length = remote_size(response)
+        if length is not None and length != size:
+            return f"ukuran berbeda: server {length} B, manifest {size} B"
+        return ""
+
+    def _store(self, url, problem, expires_at):
+        previous = self._results.get(url)
+        previous_problem = previous.problem if previous is not None else None
+        if (previous_problem or "") != (problem or ""):
+            self.generation += 1
+        self._results[url] = LinkStatus(problem, expires_at)
+        self._set_note(url, problem)
+
+    def _set_note(self, url, problem):
+        if problem:
+            self.notes[url] = link_note(problem)
         else:
-            new_patches.append(patch_data)
+            self.notes.pop(url, None)
+
+    # Fungsi untuk memeriksa link yang belum diperiksa atau hasilnya sudah kedaluwarsa
+    async def verify(self, links):
+        now = time.monotonic()
+        pending = {
+            url: size for url, size in links.items()
+            if url not in self._results or self._results[url].expires_at <= now
+        }
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def check(url, size):
+            async with semaphore:
+                try:
+                    problem = await self.probe(url, size)
+                except httpx.HTTPError as error:
+                    self.errors += 1
+                    logger.debug("Gagal memeriksa %s: %r", url, error)
+                    previous = self._results.get(url)
+                    self._store(url, previous.problem if previous else None, time.monotonic() + LINK_CHECK_RETRY)
+                    return
+                self.probes += 1
+                if problem:
+                    logger.warning("Link bermasalah: %s (%s)", url, problem)
+                self._store(url, problem, time.monotonic() + self.ttl)
+
+        await asyncio.gather(*(check(url, size) for url, size in pending.items()))
+        return len(pending)
+
+    # Fungsi untuk membuang hasil link yang sudah tidak ada di manifest mana pun
+    def prune(self, links):
+        for url in self._results.keys() - links.keys():
+            self.notes.pop(url, None)
+            if self._results.pop(url).problem:
+                self.generation += 1
+
+    # Status link untuk snapshot warm start: [url, keterangan, sisa umur hasil (detik)]
+    def export(self):
+        now = time.monotonic()
+        return [[url, status.problem, status.expires_at - now] for url, status in self._results.items()]
+
+    # Pulihkan status link dari snapshot yang disimpan elapsed detik lalu; hasil yang sudah
+    # kedaluwarsa tetap dipakai sampai diperiksa ulang, jadi perubahan status tetap terdeteksi
+    def restore(self, entries, elapsed):
+        now = time.monotonic()
+        for url, problem, remaining in entries:
+            if url not in self._results:
+                self._results[url] = LinkStatus(problem, now + remaining - elapsed)
+                self._set_note(url, problem)
+
+    # Minta pemeriksaan segera (dipanggil saat manifest baru selesai di-parse)
+    def wake(self):
+        self._wakeup.set()
+
+    async def run(self, interval):
+        while True:
+            self._wakeup.clear()
+            links = {}
+            for game, region, url in manifest_endpoints():
+                manifest = MANIFEST_CACHE.peek(url)
+                if manifest is not None:
+                    links.update(manifest_links(manifest))
+            try:
+                await self.verify(links)
+                self.prune(links)
+                self.runs += 1
+            except Exception:
+                logger.exception("Verifikasi link gagal")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self):
+        return {
+            'links_checked': len(self._results),
+            'links_broken': sum(bool(status.problem) for status in self._results.values()),
+            'link_probes': self.probes,
+            'link_probe_errors': self.errors,
+        }
 
-    return full_installation_files, old_patches, new_patches, bool(major or patches)
+LINK_VERIFIER = LinkVerifier(LINK_CHECK_TTL, LINK_CHECK_CONCURRENCY)
+
+# Fungsi untuk membuat penanda link bermasalah di pesan
+def link_note(problem):
+    return f" ⚠️ <i>{problem}</i>"
+
+async def start_link_verifier(app):
+    if LINK_CHECK_INTERVAL > 0:
+        app.bot_data['link_verifier_task'] = asyncio.create_task(LINK_VERIFIER.run(LINK_CHECK_INTERVAL))
+
+async def stop_link_verifier(app):
+    task = app.bot_data.pop('link_verifier_task', None)
+    if task is not None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    await LINK_VERIFIER.close()
+
+# Token bucket sederhana; token boleh minus agar antrean adil tanpa lock
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Pesan satu token, kembalikan lama waktu menunggu sampai token tersedia
+    def reserve(self):
+        self._refill()
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    # Lama waktu sampai satu token tersedia, tanpa memesan
+    def available_in(self):
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    # Lama waktu sampai bucket penuh kembali
+    def refill_delay(self):
+        self._refill()
+        return (self.capacity - self.tokens) / self.rate
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    # Tahan bucket selama seconds detik (dipakai saat Telegram mengirim RetryAfter)
+    def pause(self, seconds):
+        self.reserve()
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+# Prioritas pesan keluar: balasan command/tombol didahulukan dari notifikasi massal
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+
+# Batas global dengan antrean per prioritas: token berikutnya selalu diberikan ke pesan
+# interaktif yang menunggu sebelum pesan massal, walaupun pesan massal antre lebih dulu
+class PriorityGate:
+    def __init__(self, rate, capacity):
+        self.bucket = TokenBucket(rate, capacity)
+        self._waiters = (deque(), deque())
+        self._dispatcher = None
+
+    async def acquire(self, priority=PRIORITY_INTERACTIVE):
+        if not any(self._waiters) and self.bucket.available_in() <= 0:
+            self.bucket.tokens -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(future)
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    async def _dispatch(self):
+        while True:
+            waiters = next((queue for queue in self._waiters if queue), None)
+            if waiters is None:
+                return
+            delay = self.bucket.available_in()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            future = waiters.popleft()
+            # Future milik worker yang sudah dibatalkan dilewati tanpa memakai token
+            if not future.done():
+                self.bucket.tokens -= 1
+                future.set_result(None)
+
+    async def close(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+
+# Satu pekerjaan kirim; call adalah fungsi async tanpa argumen
+class OutboundJob:
+    __slots__ = ('call', 'key', 'priority', 'future', 'enqueued_at')
+
+    def __init__(self, call, key, priority=PRIORITY_INTERACTIVE):
+        self.call = call
+        self.key = key
+        self.priority = priority
+        self.future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+
+# Penjadwal semua pesan keluar: batas global (dengan prioritas) dan per chat, RetryAfter,
+# dan edit yang digantikan. Bucket per chat hanya disimpan selama chat itu masih aktif.
+class OutboundScheduler:
+    def __init__(self, global_rate=30, private_rate=1.0, group_rate=20 / 60):
+        self.bot = None
+        self.global_rate = global_rate
+        self.private_rate = private_rate
+        self.group_rate = group_rate
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.superseded = 0
+        self.latencies = deque(maxlen=1000)
+        self._global = PriorityGate(global_rate, global_rate)
+        self._chats = {}
+        self._queues = {}
+        self._keyed = {}
+        self._workers = {}
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            # ID chat negatif adalah grup/channel yang batasnya lebih ketat
+            rate = self.group_rate if chat_id < 0 else self.private_rate
+            bucket = self._chats[chat_id] = TokenBucket(rate, 1)
+        return bucket
+
+    # Masukkan pekerjaan ke antrean chat; pekerjaan dengan key yang sama dan belum terkirim digantikan
+    def submit(self, chat_id, call, key=None, priority=PRIORITY_INTERACTIVE):
+        if key is not None and key in self._keyed:
+            job = self._keyed[key]
+            # Pemanggil edit lama bisa sudah dibatalkan (timeout handler, shutdown)
+            if not job.future.done():
+                job.future.set_result(None)
+            job.future = asyncio.get_running_loop().create_future()
+            job.call = call
+            self.superseded += 1
+            return job.future
+
+        job = OutboundJob(call, key, priority)
+        if key is not None:
+            self._keyed[key] = job
+        self._queues.setdefault(chat_id, deque()).append(job)
+        if chat_id not in self._workers:
+            self._workers[chat_id] = asyncio.create_task(self._run_chat(chat_id))
+        return job.future
+
+    async def _run_chat(self, chat_id):
+        queue = self._queues[chat_id]
+        bucket = self._chat_bucket(chat_id)
+        try:
+            while True:
+                await self._drain(queue, bucket)
+                # Worker dan bucket chat baru dilepas setelah bucket penuh lagi, agar batas per chat
+                # tetap berlaku untuk pesan berikutnya; pesan yang masuk selama menunggu ikut diproses
+                delay = bucket.refill_delay()
+                if delay <= 0 and not queue:
+                    break
+                await asyncio.sleep(delay)
+        finally:
+            self._workers.pop(chat_id, None)
+            if not queue:
+                self._queues.pop(chat_id, None)
+                self._chats.pop(chat_id, None)
+
+    async def _drain(self, queue, bucket):
+        while queue:
+            await bucket.acquire()
+            await self._global.acquire(queue[0].priority)
+            job = queue[0]
+            # Pekerjaan yang sedang dikirim tidak bisa digantikan lagi
+            if job.key is not None and self._keyed.get(job.key) is job:
+                del self._keyed[job.key]
+            try:
+                result = await job.call()
+            except RetryAfter as error:
+                # Coba lagi pekerjaan yang sama setelah masa tunggu dari Telegram
+                self.retries += 1
+                bucket.pause(error.retry_after)
+                continue
+            except Exception as error:
+                self.failed += 1
+                self._finish(queue, job, error=error)
+            else:
+                self.sent += 1
+                self._finish(queue, job, result=result)
+
+    def _finish(self, queue, job, result=None, error=None):
+        queue.popleft()
+        self.latencies.append(time.monotonic() - job.enqueued_at)
+        if job.future.done():
+            return
+        if error is not None:
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(result)
+
+    def depth(self):
+        return sum(len(queue) for queue in self._queues.values())
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+        percentile = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 1) if latencies else 0.0
+        return {
+            'outbound_depth': self.depth(),
+            'outbound_sent': self.sent,
+            'outbound_failed': self.failed,
+            'outbound_retries': self.retries,
+            'outbound_superseded': self.superseded,
+            'outbound_p50_ms': percentile(0.5),
+            'outbound_p99_ms': percentile(0.99),
+        }
 
-# Fungsi untuk menyimpan pembaruan ke file HTML Zenless Zone Zero
-def save_to_html_zzz(full_installation_files, old_patches, new_patches, file_path="updates_zzz.html"):
-    html_content = "<html><body>"
-    html_content += "<h1>ZENLESS ZONE ZERO (MANUAL UPDATE)</h1>\n"
+    # Tunggu semua pesan yang antre terkirim (maksimal timeout detik), lalu hentikan semua worker
+    async def stop(self, timeout=10.0):
+        pending = [job.future for queue in self._queues.values() for job in queue if not job.future.done()]
+        if pending:
+            await asyncio.wait(pending, timeout=timeout)
+        for worker in list(self._workers.values()):
+            worker.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        await self._global.close()
+
+OUTBOUND = OutboundScheduler()
+
+# Fungsi untuk membalas pesan lewat penjadwal pesan keluar
+async def reply_text(message, text, **kwargs):
+    result = await OUTBOUND.submit(message.chat_id, functools.partial(message.reply_text, text, **kwargs))
+    record_first_reply()
+    return result
+
+# Fungsi untuk mengedit pesan lewat penjadwal; edit yang belum terkirim digantikan edit terbaru
+async def edit_text(message, text, **kwargs):
+    try:
+        result = await OUTBOUND.submit(
+            message.chat_id,
+            functools.partial(message.edit_text, text, **kwargs),
+            key=('edit', message.chat_id, message.message_id)
+        )
+        record_first_reply()
+        return result
+    except BadRequest as error:
+        # Tombol yang ditekan ulang (misalnya saat replay throttle) menghasilkan isi yang sama
+        if "not modified" not in str(error).lower():
+            raise
+
+# Batas waktu antar permintaan yang sama per pengguna dan per chat (detik, 0 = nonaktif)
+THROTTLE_USER_COOLDOWN = float(os.environ.get("THROTTLE_USER_COOLDOWN", "10"))
+THROTTLE_CHAT_COOLDOWN = float(os.environ.get("THROTTLE_CHAT_COOLDOWN", "3"))
+THROTTLE_MAX_ENTRIES = 10000
+
+# Pembatas permintaan berulang; kunci aksi = teks command (tanpa @bot) atau data callback
+class Throttle:
+    def __init__(self, user_cooldown, chat_cooldown):
+        self.user_cooldown = user_cooldown
+        self.chat_cooldown = chat_cooldown
+        self._last_seen = {}
+        self.allowed = 0
+        self.replayed = 0
+        self.suppressed = 0
+
+    # Kembalikan True jika aksi boleh diproses; waktu hanya dicatat untuk permintaan yang lolos
+    def allow(self, user_id, chat_id, action):
+        now = time.monotonic()
+        windows = (
+            (('user', user_id, action), self.user_cooldown),
+            (('chat', chat_id, action), self.chat_cooldown),
+        )
+        for key, cooldown in windows:
+            if key[1] is not None and now - self._last_seen.get(key, float('-inf')) < cooldown:
+                return False
+        for key, cooldown in windows:
+            if key[1] is not None and cooldown > 0:
+                self._last_seen[key] = now
+        if len(self._last_seen) > THROTTLE_MAX_ENTRIES:
+            self._prune(now)
+        self.allowed += 1
+        return True
+
+    # Hapus catatan yang sudah lewat masa cooldown-nya
+    def _prune(self, now):
+        longest = max(self.user_cooldown, self.chat_cooldown)
+        self._last_seen = {
+            key: seen for key, seen in self._last_seen.items() if now - seen < longest
+        }
 
-    # Full Installation
-    html_content += "<h2>Full Installation</h2>\n"
-    if full_installation_files:
-        grouped_files = {}
-        for file in full_installation_files:
-            version = file['version']
-            if version not in grouped_files:
-                grouped_files[version] = []
-            grouped_files[version].append(file)
-
-        for version, files in grouped_files.items():
-            html_content += f"<h3>Version {version}</h3>\n<ul>"
-            for file in files:
-                html_content += f"<li><a href=\"{file['url']}\">{file['type']}</a> ({file['size']})</li>\n"
-            html_content += "</ul>"
-    else:
-        html_content += "<p>No data available for Full Installation.</p>\n"
+    def stats(self):
+        return {
+            'throttle_allowed': self.allowed,
+            'throttle_replayed': self.replayed,
+            'throttle_suppressed': self.suppressed,
+        }
 
-    # Patches
-    html_content += "<h2>Download From Patch</h2>\n"
-    if old_patches:
-        for patch in old_patches:
-            html_content += f"<h3>Version {patch['version']}</h3>\n<ul>"
-            for file in patch['game_pkgs']:
-                html_content += f"<li><a href=\"{file['url']}\">{file['type']}</a> ({file['size']})</li>\n"
-            for file in patch['audio_pkgs']:
-                html_content += f"<li><a href=\"{file['url']}\">{file['type']}</a> ({file['size']})</li>\n"
-            html_content += "</ul>"
-    else:
-        html_content += "<p>No old patches available.</p>\n"
-
-    html_content += "</body></html>"
-
-    with open(file_path, "w") as file:
-        file.write(html_content)
-
-# Fungsi command untuk menampilkan pembaruan Zenless Zone Zero
-async def update_zzz_command(update: Update, context: CallbackContext):
-    full_installation_files, old_patches, new_patches, has_updates = get_game_updates_zzz()
-
-    if has_updates:
-        save_to_html_zzz(full_installation_files, old_patches, new_patches)
-        message = "<b>ZENLESS ZONE ZERO (MANUAL UPDATE)</b>\n\n"
-
-        # Full Installation
-        message += "- <b>Full Installation</b>\n"
-        grouped_files = {}
-        for file in full_installation_files:
-            version = file['version']
-            if version not in grouped_files:
-                grouped_files[version] = []
-            grouped_files[version].append(file)
-
-        for version, files in grouped_files.items():
-            message += f" <b>Version {version}</b>\n"
-            for file in files:
-                message += f"  <a href=\"{file['url']}\">{file['type']}</a> ({file['size']}) \n"
-            message += "\n"
+THROTTLE = Throttle(THROTTLE_USER_COOLDOWN, THROTTLE_CHAT_COOLDOWN)
 
-        # Old Patches
-        message += "- <b>Download From Patch</b>\n"
-        if old_patches:
-            for patch in old_patches:
-                message += f" <b>Version {patch['version']}</b>\n"
-                for file in patch['game_pkgs']:
-                    message += f"  <a href=\"{file['url']}\">{file['type']}</a> ({file['size']}) \n"
-                for file in patch['audio_pkgs']:
-                    message += f"  <a href=\"{file['url']}\">{file['type']}</a> ({file['size']}) \n"
-                message += "\n"
+# Fungsi untuk membungkus handler dengan throttle. Handler yang replayable dipanggil dengan
+# replay=True selama cooldown agar mengirim ulang hasil render terakhir tanpa fetch/tulis file;
+# handler lain diabaikan selama cooldown
+def throttled(callback, replayable=False):
+    async def handler(update: Update, context: CallbackContext):
+        if update.callback_query:
+            action = ('callback', update.callback_query.data)
+            name = update.callback_query.data.split('_', 1)[0]
         else:
-            message += " No old patches available.\n\n"
-
-        # New Patches
-        message += "***********\n"
-        if new_patches:
-            for patch in new_patches:
-                message += f" <b>Version {patch['version']}</b>\n"
-                for file in patch['game_pkgs']:
-                    message += f"  <a href=\"{file['url']}\">{file['type']}</a> ({file['size']}) \n"
-                for file in patch['audio_pkgs']:
-                    message += f"  <a href=\"{file['url']}\">{file['type']}</a> ({file['size']}) \n"
-                message += "\n"
+            words = (update.effective_message.text or "").lower().split()
+            action = (words[0].split('@')[0],) + tuple(words[1:]) if words else ()
+            name = action[0] if action else ""
+        user_id = update.effective_user.id if update.effective_user else None
+        chat_id = update.effective_chat.id if update.effective_chat else None
+
+        if THROTTLE.allow(user_id, chat_id, action):
+            mode, kwargs = "fresh", {}
+        elif replayable:
+            THROTTLE.replayed += 1
+            mode, kwargs = "replay", {'replay': True}
         else:
-            current_time = datetime.now().strftime("%d-%m-%Y %H:%M:%S")
-            message += f"Update terakhir pada: {current_time}\n\n"
-
-        await update.message.reply_text(message, parse_mode="HTML")
-    else:
-        await update.message.reply_text(
-            "Tidak ada pembaruan tersedia saat ini.",
-            parse_mode="HTML"
+            THROTTLE.suppressed += 1
+            if update.callback_query:
+                await update.callback_query.answer()
+            return
+
+        try:
+            with HANDLER_SECONDS.time(handler=name, mode=mode):
+                return await callback(update, context, **kwargs)
+        except Exception:
+            HANDLER_ERRORS.inc(handler=name)
+            raise
+    return handler
+
+# Fungsi untuk mendapatkan hasil render; saat replay memakai hasil render terakhir jika ada
+# (permintaan pertama yang masih berjalan digabung oleh cache manifest)
+async def updates_for(game, region, replay=False):
+    rendered = _rendered_updates.get((game.key, region)) if replay else None
+    if rendered is None:
+        rendered = await render_updates(game, region)
+    return rendered
+
+NO_UPDATES_MESSAGE = "Tidak ada pembaruan tersedia saat ini."
+UPSTREAM_ERROR_MESSAGE = "Server API sedang bermasalah dan belum ada data tersimpan. Coba lagi nanti."
+
+# Fungsi untuk membuat command pembaruan untuk sebuah game
+def game_update_command(game):
+    # Game dengan beberapa region menampilkan pilihan server terlebih dahulu
+    # kecuali jika server (atau "all") diberikan sebagai argumen
+    async def command(update: Update, context: CallbackContext, replay=False):
+        region = default_region(game)
+        if has_regions(game):
+            region = find_region(game, context.args[0]) if context.args else None
+            if region is None:
+                await reply_text(
+                    update.message,
+                    f"Pilih server {game.title.title()}:",
+                    reply_markup=region_keyboard(game)
+                )
+                return
+
+        try:
+            rendered = await updates_for(game, region, replay)
+        except UpstreamError:
+            await reply_text(update.message, UPSTREAM_ERROR_MESSAGE, parse_mode="HTML")
+            return
+        if rendered is None:
+            await reply_text(update.message, NO_UPDATES_MESSAGE, parse_mode="HTML")
+            return
+        await reply_text(
+            update.message,
+            update_message_text(rendered, notice=fallback_notice(game, region)),
+            parse_mode="HTML",
+            reply_markup=update_reply_markup(game, region, rendered)
         )
+    return command
+
+# Fungsi untuk mencari nama region dari argumen command (tidak peka huruf besar/kecil)
+def find_region(game, name):
+    if name.lower() == ALL_REGIONS:
+        return ALL_REGIONS
+    for region in game.endpoints:
+        if region.lower() == name.lower():
+            return region
+    return None
+
+# Fungsi untuk membaca argumen "<game> [server]" menjadi (game, region)
+def parse_game_region(args):
+    if not args or args[0].lower() not in GAMES:
+        return None
+    game = GAMES[args[0].lower()]
+    if len(args) > 1 and has_regions(game):
+        region = find_region(game, args[1])
+        return (game, region) if region is not None else None
+    return game, default_region(game)
+
+# Fungsi untuk membuat tombol pilihan region
+def region_keyboard(game):
+    keyboard = [
+        [InlineKeyboardButton(region, callback_data=f"{game.key}_{region}")]
+        for region in game.endpoints
+    ]
+    keyboard.append([InlineKeyboardButton("🌐 Semua Server", callback_data=f"{game.key}_{ALL_REGIONS}")])
+    return InlineKeyboardMarkup(keyboard)
 
-# Fungsi untuk mendapatkan data pembaruan game Honkai Star Rail
-def get_game_updates_hsr():
-    url = "https://api.mazagung.id/game.php?id=4ziysqXOQ8"
-    response = requests.get(url)
-    data = response.json()
+# Fungsi untuk membuat tombol kembali ke daftar server
+def back_keyboard(game):
+    return InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Kembali", callback_data=f"{game.key}_back")]])
 
-    full_installation_files = []
-    old_patches = []
-    new_patches = []
+# Fungsi untuk menangani callback dari pilihan server
+async def region_callback(update: Update, context: CallbackContext, replay=False):
+    query = update.callback_query
+    await query.answer()
 
-    pre_download = data['data']['game_packages'][0].get('pre_download', {})
-    main = data['data']['game_packages'][0].get('main', {})
-    
-    major = pre_download.get('major', {}) or main.get('major', {})
-    patches = pre_download.get('patches', []) or main.get('patches', [])
+    game_key, region = query.data.split('_', 1)
+    game = GAMES[game_key]
 
-    # Full Installation
-    if major:
-        version = major['version']
-        game_pkgs = major.get('game_pkgs', [])
-        for index, game_pkg in enumerate(game_pkgs, start=1):
-            filename = extract_filename(game_pkg['url'], index)
-            full_installation_files.append({
-                'type': filename,
-                'version': version,
-                'url': game_pkg['url'],
-                'size': format_size(game_pkg['size'])
-            })
-
-        for audio_pkg in major.get('audio_pkgs', []):
-            audio_type = "Unknown"
-            if "Chinese" in audio_pkg['url']:
-                audio_type = "Audio CN"
-            elif "English" in audio_pkg['url']:
-                audio_type = "Audio US"
-            elif "Korean" in audio_pkg['url']:
-                audio_type = "Audio KR"
-            elif "Japanese" in audio_pkg['url']:
-                audio_type = "Audio JP"
-
-            full_installation_files.append({
-                'type': audio_type,
-                'version': version,
-                'url': audio_pkg['url'],
-                'size': format_size(audio_pkg['size'])
-            })
+    # Jika tombol "Kembali" ditekan, kembali ke daftar server
+    if region == "back":
+        # Gunakan edit_text agar tidak terjadi error
+        await edit_text(query.message, f"Pilih server {game.title.title()}:", reply_markup=region_keyboard(game))
+        return
 
-    # Patches
-    for patch in patches:
-        patch_data = {
-            'version': patch['version'],
-            'game_pkgs': [
-                {
-                    'type': 'Game Data',
-                    'url': game_pkg['url'],
-                    'size': format_size(game_pkg['size'])
-                }
-                for game_pkg in patch.get('game_pkgs', [])
-            ],
-            'audio_pkgs': [
-                {
-                    'type': "Audio CN" if "audio_zh-cn" in audio_pkg['url'] else
-                            "Audio TW" if "audio_zh-tw" in audio_pkg['url'] else
-                            "Audio US" if "audio_en-us" in audio_pkg['url'] else
-                            "Audio JP" if "audio_ja-jp" in audio_pkg['url'] else
-                            "Audio KR" if "audio_ko-kr" in audio_pkg['url'] else
-                            "Unknown",
-                    'url': audio_pkg['url'],
-                    'size': format_size(audio_pkg['size'])
-                }
-                for audio_pkg in patch.get('audio_pkgs', [])
-            ]
-        }
-        if patch['version'] < major.get('version', ''):
-            old_patches.append(patch_data)
-        else:
-            new_patches.append(patch_data)
+    try:
+        rendered = await updates_for(game, region, replay)
+    except UpstreamError:
+        await edit_text(query.message, UPSTREAM_ERROR_MESSAGE, parse_mode="HTML", reply_markup=back_keyboard(game))
+        return
+    if rendered is None:
+        await edit_text(query.message, NO_UPDATES_MESSAGE, parse_mode="HTML", reply_markup=back_keyboard(game))
+        return
 
-    return full_installation_files, old_patches, new_patches, bool(major or patches)
+    await edit_text(
+        query.message,
+        update_message_text(rendered, notice=fallback_notice(game, region)),
+        parse_mode="HTML",
+        reply_markup=update_reply_markup(game, region, rendered)
+    )
 
-# Fungsi untuk menyimpan pembaruan ke file HTML Honkai Star Rail
-def save_to_html_hsr(full_installation_files, old_patches, new_patches, file_path="updates_hsr.html"):
-    html_content = "<html><body>"
-    html_content += "<h1>HONKAI STAR RAIL (MANUAL UPDATE)</h1>\n"
+# Fungsi untuk menangani tombol halaman; halaman diambil dari hasil render yang tersimpan,
+# sehingga replay dari throttle berjalan sama seperti permintaan biasa
+async def page_callback(update: Update, context: CallbackContext, replay=False):
+    query = update.callback_query
+    await query.answer()
 
-    # Full Installation
-    html_content += "<h2>Full Installation</h2>\n"
-    if full_installation_files:
-        grouped_files = {}
-        for file in full_installation_files:
-            version = file['version']
-            if version not in grouped_files:
-                grouped_files[version] = []
-            grouped_files[version].append(file)
-
-        for version, files in grouped_files.items():
-            html_content += f"<h3>Version {version}</h3>\n<ul>"
-            for file in files:
-                html_content += f"<li><a href=\"{file['url']}\">{file['type']}</a> ({file['size']})</li>\n"
-            html_content += "</ul>"
-    else:
-        html_content += "<p>No data available for Full Installation.</p>\n"
+    _, game_key, region, page = query.data.split('_')
+    game = GAMES[game_key]
 
-    # Patches
-    html_content += "<h2>Download From Patch</h2>\n"
-    if old_patches:
-        for patch in old_patches:
-            html_content += f"<h3>Version {patch['version']}</h3>\n<ul>"
-            for file in patch['game_pkgs']:
-                html_content += f"<li><a href=\"{file['url']}\">{file['type']}</a> ({file['size']})</li>\n"
-            for file in patch['audio_pkgs']:
-                html_content += f"<li><a href=\"{file['url']}\">{file['type']}</a> ({file['size']})</li>\n"
-            html_content += "</ul>"
-    else:
-        html_content += "<p>No old patches available.</p>\n"
-
-    html_content += "</body></html>"
-
-    with open(file_path, "w") as file:
-        file.write(html_content)
-
-# Fungsi command untuk menampilkan pembaruan Honkai Star Rail
-async def update_hsr_command(update: Update, context: CallbackContext):
-    full_installation_files, old_patches, new_patches, has_updates = get_game_updates_hsr()
-
-    if has_updates:
-        save_to_html_hsr(full_installation_files, old_patches, new_patches)
-        message = "<b>HONKAI STAR RAIL (MANUAL UPDATE)</b>\n\n"
-
-        # Full Installation
-        message += "- <b>Full Installation</b>\n"
-        grouped_files = {}
-        for file in full_installation_files:
-            version = file['version']
-            if version not in grouped_files:
-                grouped_files[version] = []
-            grouped_files[version].append(file)
-
-        for version, files in grouped_files.items():
-            message += f" <b>Version {version}</b>\n"
-            for file in files:
-                message += f"  <a href=\"{file['url']}\">{file['type']}</a> ({file['size']}) \n"
-            message += "\n"
-
-        # Old Patches
-        message += "- <b>Download From Patch</b>\n"
-        if old_patches:
-            for patch in old_patches:
-                message += f" <b>Version {patch['version']}</b>\n"
-                for file in patch['game_pkgs']:
-                    message += f"  <a href=\"{file['url']}\">{file['type']}</a> ({file['size']}) \n"
-                for file in patch['audio_pkgs']:
-                    message += f"  <a href=\"{file['url']}\">{file['type']}</a> ({file['size']}) \n"
-                message += "\n"
-        else:
-            message += " No old patches available.\n\n"
-
-        # New Patches
-        message += "***********\n"
-        if new_patches:
-            for patch in new_patches:
-                message += f" <b>Version {patch['version']}</b>\n"
-                for file in patch['game_pkgs']:
-                    message += f"  <a href=\"{file['url']}\">{file['type']}</a> ({file['size']}) \n"
-                for file in patch['audio_pkgs']:
-                    message += f"  <a href=\"{file['url']}\">{file['type']}</a> ({file['size']}) \n"
-                message += "\n"
-        else:
-            current_time = datetime.now().strftime("%d-%m-%Y %H:%M:%S")
-            message += f"Update terakhir pada: {current_time}\n\n"
+    try:
+        rendered = await updates_for(game, region, replay=True)
+    except UpstreamError:
+        await edit_text(query.message, UPSTREAM_ERROR_MESSAGE, parse_mode="HTML")
+        return
+    if rendered is None:
+        await edit_text(query.message, NO_UPDATES_MESSAGE, parse_mode="HTML")
+        return
 
-        await update.message.reply_text(message, parse_mode="HTML")
-    else:
-        await update.message.reply_text(
-            "Tidak ada pembaruan tersedia saat ini.",
-            parse_mode="HTML"
+    page = min(int(page), len(rendered.pages) - 1)
+    await edit_text(
+        query.message,
+        update_message_text(rendered, page, notice=fallback_notice(game, region)),
+        parse_mode="HTML",
+        reply_markup=update_reply_markup(game, region, rendered, page)
+    )
+
+# Kata kunci tambahan untuk pencarian inline (selain key, command, dan judul game)
+GAME_ALIASES = {'gi': ("genshin",), 'zzz': ("zenless",), 'hsr': ("starrail", "sr"), 'honkai': ("hi3", "bh3")}
+INLINE_CACHE_TIME = int(os.environ.get("INLINE_CACHE_TIME", "30"))
+INLINE_MAX_RESULTS = 20
+INLINE_MAX_CACHED_QUERIES = 1000
+
+# Satu hasil pencarian inline beserta kata kuncinya
+SearchEntry = namedtuple('SearchEntry', ['tokens', 'result', 'is_summary'])
+
+# Indeks pencarian inline yang dibangun dari snapshot manifest di memori (tanpa fetch).
+# Dibangun ulang hanya jika isi salah satu manifest atau status link (tanda ⚠️) berubah.
+class SearchIndex:
+    def __init__(self):
+        self.signature = None
+        self.entries = []
+        self.vocabulary = {}
+        self.prefixes = {}
+        self.builds = 0
+        self._results = {}
+
+    def refresh(self):
+        snapshots = [(game, region, MANIFEST_CACHE.peek(url)) for game, region, url in manifest_endpoints()]
+        signature = (
+            tuple(getattr(manifest, 'content_hash', None) for _, _, manifest in snapshots),
+            LINK_VERIFIER.generation,
         )
-
-# Fungsi untuk mendapatkan data pembaruan game Honkai Impact 3
-def get_game_updates_honkai(server_url):
-    response = requests.get(server_url)
-    data = response.json()
-
-    full_installation_files = []
-    old_patches = []
-    new_patches = []
-
-    pre_download = data['data']['game_packages'][0].get('pre_download', {})
-    main = data['data']['game_packages'][0].get('main', {})
-    
-    major = pre_download.get('major', {}) or main.get('major', {})
-    patches = pre_download.get('patches', []) or main.get('patches', [])
-
-    # Full Installation
-    if major:
-        version = major['version']
-        game_pkgs = major.get('game_pkgs', [])
-        for index, game_pkg in enumerate(game_pkgs, start=1):
-            filename = extract_filename(game_pkg['url'], index)
-            full_installation_files.append({
-                'type': filename,
-                'version': version,
-                'url': game_pkg['url'],
-                'size': format_size(game_pkg['size'])
-            })
-
-    # Patches
-    for patch in patches:
-        patch_data = {
-            'version': patch['version'],
-            'game_pkgs': [
-                {
-                    'type': 'Game Data',
-                    'url': game_pkg['url'],
-                    'size': format_size(game_pkg['size'])
-                }
-                for game_pkg in patch.get('game_pkgs', [])
-            ]
-        }
-        if patch['version'] < major.get('version', ''):
-            old_patches.append(patch_data)
+        if signature != self.signature:
+            self._build(snapshots)
+            self.signature = signature
+
+    def _build(self, snapshots):
+        self.entries = []
+        for game, region, manifest in snapshots:
+            if manifest is not None and manifest.has_updates:
+                self.entries.extend(search_entries(game, region, manifest))
+        self.vocabulary = {}
+        self.prefixes = {}
+        for index, entry in enumerate(self.entries):
+            for token in entry.tokens:
+                self.vocabulary.setdefault(token, set()).add(index)
+                for end in range(1, len(token)):
+                    self.prefixes.setdefault(token[:end], set()).add(index)
+        self._results = {}
+        self.builds += 1
+
+    # Cocokkan setiap kata: persis (3), awalan (2), atau mirip (1); semua kata harus cocok
+    def _match(self, word):
+        matches = dict.fromkeys(self.vocabulary.get(word, ()), 3)
+        for index in self.prefixes.get(word, ()):
+            matches.setdefault(index, 2)
+        if not matches:
+            for token in difflib.get_close_matches(word, self.vocabulary, n=3, cutoff=0.75):
+                for index in self.vocabulary[token]:
+                    matches.setdefault(index, 1)
+        return matches
+
+    def search(self, text):
+        words = tuple(text.lower().split())
+        results = self._results.get(words)
+        if results is not None:
+            return results
+
+        if not words:
+            ranked = [index for index, entry in enumerate(self.entries) if entry.is_summary]
         else:
-            new_patches.append(patch_data)
-
-    return full_installation_files, old_patches, new_patches, bool(major or patches)
+            scores = self._match(words[0])
+            for word in words[1:]:
+                matches = self._match(word)
+                scores = {index: score + matches[index] for index, score in scores.items() if index in matches}
+            ranked = sorted(scores, key=lambda index: (-scores[index], not self.entries[index].is_summary, index))
+
+        results = [self.entries[index].result for index in ranked[:INLINE_MAX_RESULTS]]
+        if len(self._results) >= INLINE_MAX_CACHED_QUERIES:
+            self._results.clear()
+        self._results[words] = results
+        return results
+
+SEARCH_INDEX = SearchIndex()
+
+# Fungsi untuk membuat entri pencarian satu manifest: ringkasan + satu entri per versi
+def search_entries(game, region, manifest):
+    title = display_title(game, region)
+    base_tokens = {game.key, game.command.lower(), *game.title.lower().split(), *GAME_ALIASES.get(game.key, ())}
+    if has_regions(game):
+        base_tokens.add(region.lower())
+
+    # Halaman pertama apa adanya: tanpa waktu update (basi di cache indeks) dan tanpa nomor halaman
+    # (pesan inline tidak punya tombol navigasi); jika terpotong, arahkan ke command lengkapnya
+    rendered = render_manifest(game, region, manifest)
+    summary = rendered.pages[0]
+    if len(rendered.pages) > 1:
+        summary += f"<i>Daftar lengkap: /{game.command.lower()}</i>"
+    package_count = sum(len(release.packages) for release in manifest.releases)
+    yield SearchEntry(
+        tokens=frozenset(base_tokens | {manifest.latest_version}),
+        result=InlineQueryResultArticle(
+            id=f"{game.key}:{region}",
+            title=title,
+            description=f"Versi {manifest.latest_version or '-'} • {package_count} file full installation",
+            input_message_content=InputTextMessageContent(summary, parse_mode="HTML"),
+        ),
+        is_summary=True,
+    )
+
+    groups = [('full', "Full Installation", release.version, release.packages) for release in manifest.releases]
+    groups += [('old', "Patch", patch.version, patch.game_pkgs + patch.audio_pkgs) for patch in manifest.old_patches]
+    groups += [('new', "Pre-download", patch.version, patch.game_pkgs + patch.audio_pkgs) for patch in manifest.new_patches]
+    for section, label, version, packages in groups:
+        message = render_message_sections(message_header(title), [(f"- <b>{label}</b>\n", [(version, "", packages)], "")])
+        total_size = sum(package.size for package in packages)
+        yield SearchEntry(
+            tokens=frozenset(base_tokens | {version, *label.lower().split()}),
+            result=InlineQueryResultArticle(
+                id=f"{game.key}:{region}:{section}:{version}",
+                title=f"{title} {version}",
+                description=f"{label} • {len(packages)} file • {format_size(total_size)}",
+                input_message_content=InputTextMessageContent(paginate_message(message)[0], parse_mode="HTML"),
+            ),
+            is_summary=False,
+        )
 
-# Fungsi untuk menyimpan pembaruan ke file HTML Honkai Impact 3
-def save_to_html_honkai(full_installation_files, old_patches, new_patches, file_path="updates_honkai.html"):
-    html_content = "<html><body>"
-    html_content += "<h1>HONKAI IMPACT 3 (MANUAL UPDATE)</h1>\n"
+# Fungsi untuk menjawab inline query (@bot gi, @bot hsr 2.3, @bot honkai japan) dari memori
+async def inline_query(update: Update, context: CallbackContext):
+    with HANDLER_SECONDS.time(handler="inline", mode="fresh"):
+        SEARCH_INDEX.refresh()
+        results = SEARCH_INDEX.search(update.inline_query.query)
+        await update.inline_query.answer(results, cache_time=INLINE_CACHE_TIME)
+        record_first_reply()
+
+# Fungsi untuk membuat kunci topik langganan dari game dan region
+def topic_key(game, region):
+    return f"{game.key}:{region.lower()}" if has_regions(game) else game.key
+
+# Daftar topik langganan: kunci -> (game, region)
+SUBSCRIPTION_TOPICS = {
+    topic_key(game, region): (game, region)
+    for game, region, _ in manifest_endpoints()
+}
 
-    # Full Installation
-    html_content += "<h2>Full Installation</h2>\n"
-    if full_installation_files:
-        grouped_files = {}
-        for file in full_installation_files:
-            version = file['version']
-            if version not in grouped_files:
-                grouped_files[version] = []
-            grouped_files[version].append(file)
-
-        for version, files in grouped_files.items():
-            html_content += f"<h3>Version {version}</h3>\n<ul>"
-            for file in files:
-                html_content += f"<li><a href=\"{file['url']}\">{file['type']}</a> ({file['size']})</li>\n"
-            html_content += "</ul>"
-    else:
-        html_content += "<p>No data available for Full Installation.</p>\n"
+# Ringkasan isi manifest yang dipakai untuk mendeteksi perubahan
+# (version: versi terbaru termasuk pre-download, live: versi yang sudah rilis)
+ManifestSignature = namedtuple('ManifestSignature', ['version', 'live', 'patches', 'pre_download'])
+
+MANIFEST_SIGNATURES = {}
+
+# Fungsi untuk membuat ringkasan versi dari manifest mentah
+def manifest_signature(data):
+    package = data['data']['game_packages'][0]
+    pre_download = package.get('pre_download') or {}
+    main = package.get('main') or {}
+    major = pre_download.get('major') or main.get('major') or {}
+    patches = (main.get('patches') or []) + (pre_download.get('patches') or [])
+    return ManifestSignature(
+        version=major.get('version', ''),
+        live=(main.get('major') or {}).get('version', ''),
+        patches=tuple(sorted({patch['version'] for patch in patches}, key=parse_version)),
+        pre_download=bool(pre_download.get('major') or pre_download.get('patches')),
+    )
+
+# Fungsi untuk membandingkan manifest baru dengan manifest terakhir yang dilihat
+def detect_manifest_change(game, region, data):
+    url = game.endpoints[region]
+    current = manifest_signature(data)
+    previous = MANIFEST_SIGNATURES.get(url)
+    MANIFEST_SIGNATURES[url] = current
+    if previous is None or previous == current:
+        return
+    message = describe_manifest_change(game, region, previous, current)
+    if message is not None:
+        notify_subscribers(topic_key(game, region), message)
+
+# Fungsi untuk membuat pesan notifikasi perubahan; None jika tidak ada yang perlu diumumkan
+# (misalnya hanya patch lama yang dihapus)
+def describe_manifest_change(game, region, previous, current):
+    lines = []
+    if previous.pre_download and not current.pre_download and current.live != previous.live:
+        lines.append(f"Versi <b>{current.live}</b> sudah rilis!")
+    elif current.version != previous.version:
+        lines.append(f"Versi baru: <b>{previous.version or '-'}</b> → <b>{current.version}</b>")
+    if current.pre_download and not previous.pre_download:
+        lines.append("Pre-download sudah tersedia!")
+    new_patches = sorted(set(current.patches) - set(previous.patches), key=parse_version)
+    if new_patches:
+        lines.append(f"Patch baru: {', '.join(new_patches)}")
+    if not lines:
+        return None
+    title = display_title(game, region)
+    return f"🔔 <b>{title}</b>\n\n" + "".join(f"{line}\n" for line in lines)
+
+# Penyimpanan daftar pelanggan notifikasi dalam file JSON
+class SubscriberStore:
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.topics = {}
+        if os.path.exists(file_path):
+            with open(file_path) as file:
+                self.topics = {topic: set(chats) for topic, chats in json.load(file).items()}
+
+    def subscribers(self, topic):
+        return set(self.topics.get(topic, ()))
+
+    def add(self, topic, chat_id):
+        self.topics.setdefault(topic, set()).add(chat_id)
+        self.save()
+
+    def remove(self, chat_id, topic=None):
+        removed = []
+        for key in [topic] if topic else list(self.topics):
+            chats = self.topics.get(key)
+            if chats and chat_id in chats:
+                chats.discard(chat_id)
+                removed.append(key)
+        if removed:
+            self.save()
+        return removed
+
+    def save(self):
+        temp_path = f"{self.file_path}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump({topic: sorted(chats) for topic, chats in self.topics.items() if chats}, file)
+        os.replace(temp_path, self.file_path)
+
+SUBSCRIBERS = SubscriberStore(os.environ.get("SUBSCRIBERS_FILE", "subscribers.json"))
+
+# Fungsi untuk mengirim notifikasi ke semua pelanggan sebuah topik
+def notify_subscribers(topic, text):
+    if OUTBOUND.bot is None:
+        return
+    for chat_id in SUBSCRIBERS.subscribers(topic):
+        future = OUTBOUND.submit(
+            chat_id, functools.partial(OUTBOUND.bot.send_message, chat_id, text, parse_mode="HTML"),
+            priority=PRIORITY_BULK,
+        )
+        future.add_done_callback(functools.partial(broadcast_done, chat_id))
 
-    # Patches
-    html_content += "<h2>Download From Patch</h2>\n"
-    if old_patches:
-        for patch in old_patches:
-            html_content += f"<h3>Version {patch['version']}</h3>\n<ul>"
-            for file in patch['game_pkgs']:
-                html_content += f"<li><a href=\"{file['url']}\">{file['type']}</a> ({file['size']})</li>\n"
-            html_content += "</ul>"
+# Fungsi untuk menangani hasil pengiriman notifikasi
+def broadcast_done(chat_id, future):
+    if future.cancelled() or future.exception() is None:
+        return
+    if isinstance(future.exception(), Forbidden):
+        # Bot diblokir atau dikeluarkan dari grup
+        SUBSCRIBERS.remove(chat_id)
     else:
-        html_content += "<p>No old patches available.</p>\n"
-
-    html_content += "<h2>New Patches</h2>\n"
-    if new_patches:
-        for patch in new_patches:
-            html_content += f"<h3>Version {patch['version']}</h3>\n<ul>"
-            for file in patch['game_pkgs']:
-                html_content += f"<li><a href=\"{file['url']}\">{file['type']}</a> ({file['size']})</li>\n"
-            html_content += "</ul>"
+        logger.warning("Gagal mengirim notifikasi ke %s: %r", chat_id, future.exception())
+
+# Fungsi untuk mengubah argumen command menjadi kunci topik langganan
+def parse_subscription_topic(args):
+    target = parse_game_region(args)
+    if target is None:
+        return None
+    topic = topic_key(*target)
+    return topic if topic in SUBSCRIPTION_TOPICS else None
+
+SUBSCRIBE_USAGE = (
+    f"Gunakan: /subscribe &lt;{'|'.join(GAMES)}&gt; [server]\n"
+    f"Server Honkai: {', '.join(HONKAI_SERVERS)}"
+)
+
+# Fungsi command untuk berlangganan notifikasi pembaruan
+async def subscribe_command(update: Update, context: CallbackContext):
+    topic = parse_subscription_topic(context.args)
+    if topic is None:
+        await reply_text(update.message, SUBSCRIBE_USAGE, parse_mode="HTML")
+        return
+    SUBSCRIBERS.add(topic, update.effective_chat.id)
+    title = display_title(*SUBSCRIPTION_TOPICS[topic])
+    await reply_text(update.message, f"Berlangganan notifikasi <b>{title}</b>.", parse_mode="HTML")
+
+# Fungsi command untuk berhenti berlangganan notifikasi
+async def unsubscribe_command(update: Update, context: CallbackContext):
+    topic = parse_subscription_topic(context.args)
+    if context.args and topic is None:
+        await reply_text(update.message, SUBSCRIBE_USAGE, parse_mode="HTML")
+        return
+    removed = SUBSCRIBERS.remove(update.effective_chat.id, topic)
+    if removed:
+        titles = ", ".join(display_title(*SUBSCRIPTION_TOPICS[key]) for key in removed)
+        await reply_text(update.message, f"Berhenti berlangganan: <b>{titles}</b>.", parse_mode="HTML")
     else:
-        html_content += "<p>No new patches available.</p>\n"
-
-    html_content += "</body></html>"
-
-    with open(file_path, "w") as file:
-        file.write(html_content)    
-
-
+        await reply_text(update.message, "Tidak ada langganan aktif.", parse_mode="HTML")
 
-# Daftar server Honkai Impact 3
-HONKAI_SERVERS = {
-    'Global': "https://api.mazagung.id/game.php?id=5TIVvvcwtM",
-    'Japan': "https://api.mazagung.id/game.php?id=g0mMIvshDb",
-    'Korea': "https://api.mazagung.id/game.php?id=uxB4MC7nzC",
-    'Overseas': "https://api.mazagung.id/game.php?id=bxPTXSET5t",
-    'Asia': "https://api.mazagung.id/game.php?id=wkE5P5WsIf"
-}
-
-# Fungsi untuk menampilkan pilihan server Honkai Impact 3
-async def update_honkai_command(update: Update, context: CallbackContext):
-    keyboard = [
-        [InlineKeyboardButton("Global", callback_data='honkai_Global')],
-        [InlineKeyboardButton("Japan", callback_data='honkai_Japan')],
-        [InlineKeyboardButton("Korea", callback_data='honkai_Korea')],
-        [InlineKeyboardButton("Overseas", callback_data='honkai_Overseas')],
-        [InlineKeyboardButton("Asia", callback_data='honkai_Asia')]
+# Fungsi untuk menjalankan poller latar belakang saat bot mulai
+async def start_background_poller(app):
+    if POLL_INTERVAL <= 0:
+        return
+    app.bot_data['poller_tasks'] = [
+        asyncio.create_task(poll_endpoint(game, region))
+        for game, region, _ in manifest_endpoints()
     ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    await update.message.reply_text("Pilih server Honkai Impact 3:", reply_markup=reply_markup)
-
-# Fungsi untuk menangani callback dari pilihan server
-async def honkai_server_callback(update: Update, context: CallbackContext):
-    query = update.callback_query
-    await query.answer()
 
-    # Jika tombol "Kembali" ditekan, kembali ke daftar server
-    if query.data == "honkai_back":
-        keyboard = [
-            [InlineKeyboardButton("Global", callback_data='honkai_Global')],
-            [InlineKeyboardButton("Japan", callback_data='honkai_Japan')],
-            [InlineKeyboardButton("Korea", callback_data='honkai_Korea')],
-            [InlineKeyboardButton("Overseas", callback_data='honkai_Overseas')],
-            [InlineKeyboardButton("Asia", callback_data='honkai_Asia')]
+# Fungsi untuk menghentikan poller latar belakang
+async def stop_background_poller(app):
+    tasks = app.bot_data.pop('poller_tasks', [])
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+# Riwayat manifest: satu snapshot per isi manifest (hash) per game dan region, disimpan di SQLite
+HISTORY_DB = os.environ.get("HISTORY_DB", "history.sqlite3")
+HISTORY_FULL_SNAPSHOTS = 10
+HISTORY_MAX_SNAPSHOTS = 200
+
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    game TEXT NOT NULL,
+    region TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    version TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    packages TEXT,
+    diff TEXT,
+    UNIQUE (game, region, content_hash)
+);
+CREATE INDEX IF NOT EXISTS snapshots_by_game ON snapshots (game, region, id DESC);
+"""
+
+# Fungsi untuk meratakan manifest menjadi daftar paket [bagian, versi, tipe, url, ukuran]
+def manifest_packages(manifest):
+    packages = [
+        ('full', release.version, file.type, file.url, file.size)
+        for release in manifest.releases for file in release.packages
+    ]
+    for section, patches in (('old', manifest.old_patches), ('new', manifest.new_patches)):
+        packages += [
+            (section, patch.version, file.type, file.url, file.size)
+            for patch in patches for file in patch.game_pkgs + patch.audio_pkgs
         ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-
-        # Gunakan query.message.edit_text agar tidak terjadi error
-        await query.message.edit_text("Pilih server Honkai Impact 3:", reply_markup=reply_markup)
+    return packages
+
+# Fungsi untuk menghitung perbedaan dua snapshot paket
+def diff_packages(previous, current):
+    before = {package[3]: package for package in previous}
+    after = {package[3]: package for package in current}
+    return {
+        'added': [package for url, package in after.items() if url not in before],
+        'removed': [package for url, package in before.items() if url not in after],
+        'resized': [
+            [url, before[url][4], package[4]]
+            for url, package in after.items() if url in before and before[url][4] != package[4]
+        ],
+        'new_versions': sorted(
+            {package[1] for package in current} - {package[1] for package in previous}, key=parse_version
+        ),
+        'size_delta': sum(package[4] for package in current) - sum(package[4] for package in previous),
+    }
+
+class HistoryStore:
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._connection = None
+        self._lock = threading.Lock()
+        self._last_hash = {}
+
+    def _connect(self):
+        if self._connection is None:
+            connection = sqlite3.connect(self.file_path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(HISTORY_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    # Simpan snapshot baru jika isi manifest berbeda dari snapshot terakhir (dijalankan di thread)
+    def record(self, game_key, region, manifest):
+        key = (game_key, region)
+        with self._lock:
+            if self._last_hash.get(key) == manifest.content_hash:
+                return False
+            connection = self._connect()
+            previous = connection.execute(
+                "SELECT content_hash, packages FROM snapshots WHERE game = ? AND region = ? ORDER BY id DESC LIMIT 1",
+                (game_key, region)
+            ).fetchone()
+            if previous is not None and previous[0] == manifest.content_hash:
+                self._last_hash[key] = manifest.content_hash
+                return False
+
+            packages = manifest_packages(manifest)
+            diff = None
+            if previous is not None and previous[1] is not None:
+                diff = diff_packages(json.loads(previous[1]), packages)
+            with connection:
+                connection.execute(
+                    "INSERT OR IGNORE INTO snapshots (game, region, content_hash, version, fetched_at, packages, diff) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (game_key, region, manifest.content_hash, manifest.latest_version, time.time(),
+                     json.dumps(packages, separators=(',', ':')), json.dumps(diff) if diff else None)
+                )
+                self._compact(connection, game_key, region)
+            self._last_hash[key] = manifest.content_hash
+            return True
+
+    # Snapshot lama hanya menyimpan diff; snapshot yang sangat lama dihapus
+    def _compact(self, connection, game_key, region):
+        ids = [row[0] for row in connection.execute(
+            "SELECT id FROM snapshots WHERE game = ? AND region = ? ORDER BY id DESC", (game_key, region)
+        )]
+        if len(ids) > HISTORY_FULL_SNAPSHOTS:
+            connection.execute(
+                "UPDATE snapshots SET packages = NULL WHERE game = ? AND region = ? AND id <= ?",
+                (game_key, region, ids[HISTORY_FULL_SNAPSHOTS])
+            )
+        if len(ids) > HISTORY_MAX_SNAPSHOTS:
+            connection.execute(
+                "DELETE FROM snapshots WHERE game = ? AND region = ? AND id <= ?",
+                (game_key, region, ids[HISTORY_MAX_SNAPSHOTS])
+            )
+
+    def history(self, game_key, region, limit=10):
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT id, fetched_at, version, diff FROM snapshots WHERE game = ? AND region = ? "
+                "ORDER BY id DESC LIMIT ?",
+                (game_key, region, limit)
+            ).fetchall()
+        return [(row[0], row[1], row[2], json.loads(row[3]) if row[3] else None) for row in rows]
+
+    def snapshot(self, snapshot_id):
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT game, region, fetched_at, version, diff FROM snapshots WHERE id = ?", (snapshot_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[:4] + (json.loads(row[4]) if row[4] else None,)
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+HISTORY = HistoryStore(HISTORY_DB)
+
+# Fungsi untuk mencatat manifest ke riwayat tanpa memblokir event loop
+async def record_history(game, region, manifest):
+    try:
+        await asyncio.to_thread(HISTORY.record, game.key, region, manifest)
+    except sqlite3.Error as error:
+        logger.warning("Gagal menyimpan riwayat %s %s: %r", game.key, region, error)
+
+# Fungsi untuk memformat selisih ukuran (+/-)
+def format_size_delta(size):
+    return f"{'+' if size >= 0 else '-'}{format_size(abs(size))}"
+
+# Fungsi untuk membuat ringkasan diff satu baris
+def summarize_diff(diff):
+    if diff is None:
+        return "snapshot awal"
+    summary = f"+{len(diff['added'])}/-{len(diff['removed'])} paket, {format_size_delta(diff['size_delta'])}"
+    if diff['new_versions']:
+        summary += f", versi baru: {', '.join(diff['new_versions'])}"
+    return summary
+
+# Fungsi command untuk menampilkan riwayat manifest sebuah game
+async def history_command(update: Update, context: CallbackContext):
+    target = parse_game_region(context.args)
+    if target is None or target[1] == ALL_REGIONS:
+        await reply_text(
+            update.message,
+            f"Gunakan: /history &lt;{'|'.join(GAMES)}&gt; [server]", parse_mode="HTML"
+        )
+        return
+    game, region = target
+    rows = await asyncio.to_thread(HISTORY.history, game.key, region)
+    if not rows:
+        await reply_text(update.message, "Belum ada riwayat tersimpan.", parse_mode="HTML")
         return
 
-    server = query.data.split('_')[1]
-    server_url = HONKAI_SERVERS[server]
-
-    full_installation_files, old_patches, new_patches, has_updates = get_game_updates_honkai(server_url)
+    message = f"<b>Riwayat {display_title(game, region)}</b>\n\n"
+    for snapshot_id, fetched_at, version, diff in rows:
+        date = datetime.fromtimestamp(fetched_at).strftime("%d-%m-%Y %H:%M")
+        message += f" #{snapshot_id} {date} <b>{version or '-'}</b>: {summarize_diff(diff)}\n"
+    message += "\nGunakan /diff &lt;id&gt; untuk melihat detail perubahan."
+    await reply_text(update.message, message, parse_mode="HTML")
+
+# Fungsi command untuk menampilkan detail perubahan sebuah snapshot
+async def diff_command(update: Update, context: CallbackContext):
+    snapshot_id = context.args[0].lstrip('#') if context.args else ""
+    row = await asyncio.to_thread(HISTORY.snapshot, int(snapshot_id)) if snapshot_id.isdigit() else None
+    if row is None:
+        await reply_text(update.message, "Gunakan: /diff &lt;id&gt; (lihat /history)", parse_mode="HTML")
+        return
 
-    if has_updates:
-        save_to_html_honkai(full_installation_files, old_patches, new_patches, file_path=f"updates_honkai_{server}.html")
-        message = f"<b>HONKAI IMPACT 3 ({server}) (MANUAL UPDATE)</b>\n\n"
+    game_key, region, fetched_at, version, diff = row
+    date = datetime.fromtimestamp(fetched_at).strftime("%d-%m-%Y %H:%M")
+    message = f"<b>Perubahan #{snapshot_id} {display_title(GAMES[game_key], region)}</b>\n"
+    message += f"{date} versi <b>{version or '-'}</b>: {summarize_diff(diff)}\n\n"
+    if diff is not None:
+        for title, packages in (("Paket baru", diff['added']), ("Paket dihapus", diff['removed'])):
+            if packages:
+                message += f"- <b>{title}</b>\n"
+                message += "".join(
+                    f"  {section} {package_version} <a href=\"{url}\">{package_type}</a> ({format_size(size)})\n"
+                    for section, package_version, package_type, url, size in packages
+                )
+                message += "\n"
+        if diff['resized']:
+            message += "- <b>Ukuran berubah</b>\n"
+            message += "".join(
+                f"  <a href=\"{url}\">file</a> {format_size(old)} → {format_size(new)}\n"
+                for url, old, new in diff['resized']
+            )
+    for page in paginate_message(message):
+        await reply_text(update.message, page, parse_mode="HTML")
+
+# Argumen bahasa audio untuk /plan -> label paket audio
+AUDIO_ARGUMENTS = {
+    'cn': "Audio CN", 'zh': "Audio CN", 'chinese': "Audio CN",
+    'tw': "Audio TW",
+    'us': "Audio US", 'en': "Audio US", 'english': "Audio US",
+    'jp': "Audio JP", 'ja': "Audio JP", 'japanese': "Audio JP",
+    'kr': "Audio KR", 'ko': "Audio KR", 'korean': "Audio KR",
+}
+DEFAULT_PLAN_AUDIO = ("Audio US",)
+
+# Rute termurah menuju satu versi target
+RoutePlan = namedtuple('RoutePlan', ['target', 'pre_download', 'steps', 'size', 'full_size'])
+
+# Tabel rute per manifest: (game.key, region) -> (content_hash, tabel)
+_route_tables = {}
+
+# Fungsi untuk mendapatkan paket sebuah langkah upgrade (audio hanya bahasa terpilih)
+def step_packages(step, audio):
+    return step.game_pkgs + tuple(package for package in step.audio_pkgs if package.type in audio)
+
+def step_size(step, audio):
+    return sum(package.size for package in step_packages(step, audio))
+
+# Fungsi untuk mendapatkan semua bahasa audio yang tersedia di manifest
+def audio_languages(manifest):
+    return sorted({
+        package.type for step in manifest.upgrade_steps for package in step.audio_pkgs
+        if package.type != "Unknown"
+    })
+
+# Fungsi untuk mencari rute termurah dari versi terpasang ke setiap target (Dijkstra).
+# Full install bisa dipakai dari versi mana pun; patch hanya dari versi asalnya.
+def shortest_routes(steps, source, audio):
+    best = {source: (0, ())}
+    queue = [(0, 0, source)]
+    counter = itertools.count(1)
+    while queue:
+        size, _, version = heapq.heappop(queue)
+        if best[version][0] < size:
+            continue
+        for step in steps:
+            if step.from_version is not None and parse_version(step.from_version) != version:
+                continue
+            target = parse_version(step.to_version)
+            total = size + step_size(step, audio)
+            if target not in best or total < best[target][0]:
+                best[target] = (total, best[version][1] + (step,))
+                heapq.heappush(queue, (total, next(counter), target))
+
+    routes = {}
+    for step in steps:
+        target = parse_version(step.to_version)
+        if step.from_version is None and target in best and target != source:
+            size, route = best[target]
+            routes[step.to_version] = RoutePlan(step.to_version, step.pre_download, route, size, step_size(step, audio))
+    return routes
+
+# Fungsi untuk membuat tabel rute untuk semua versi asal dan kombinasi bahasa audio
+def build_route_table(manifest):
+    languages = audio_languages(manifest)
+    sources = {None} | {parse_version(step.from_version) for step in manifest.upgrade_steps if step.from_version}
+    table = {}
+    for count in range(len(languages) + 1):
+        for audio in itertools.combinations(languages, count):
+            for source in sources:
+                table[(source, frozenset(audio))] = shortest_routes(manifest.upgrade_steps, source, frozenset(audio))
+    return table
+
+# Fungsi untuk mendapatkan tabel rute sebuah manifest; dibuat sekali per isi manifest
+def route_table(game, region, manifest):
+    cached = _route_tables.get((game.key, region))
+    if cached is None or cached[0] != manifest.content_hash:
+        cached = _route_tables[(game.key, region)] = (manifest.content_hash, build_route_table(manifest))
+    return cached[1]
+
+# Fungsi untuk mencari rute dari versi terpasang; versi tanpa patch hanya bisa full install
+def plan_routes(game, region, manifest, installed_version, audio):
+    table = route_table(game, region, manifest)
+    installed = parse_version(installed_version) if installed_version else None
+    routes = table.get((installed, audio)) or table[(None, audio)]
+    if installed is not None:
+        routes = {version: route for version, route in routes.items() if parse_version(version) > installed}
+    return routes
+
+# Fungsi untuk membaca argumen /plan: <game> [server] <versi terpasang|baru> [bahasa audio...]
+def parse_plan_arguments(args):
+    if not args or args[0].lower() not in GAMES:
+        return None
+    game = GAMES[args[0].lower()]
+    rest = list(args[1:])
+    region = default_region(game)
+    if has_regions(game) and rest and find_region(game, rest[0]) not in (None, ALL_REGIONS):
+        region = find_region(game, rest.pop(0))
+    if not rest:
+        return None
+    installed = rest.pop(0)
+    if installed.lower() in ("baru", "new", "0", "-"):
+        installed = None
+    elif not VERSION_PART_PATTERN.search(installed):
+        return None
+    audio = [AUDIO_ARGUMENTS.get(name.lower(), name) for name in rest]
+    return game, region, installed, audio
+
+PLAN_USAGE = (
+    f"Gunakan: /plan &lt;{'|'.join(GAMES)}&gt; [server] &lt;versi terpasang|baru&gt; [audio: cn us jp kr]\n"
+    "Contoh: /plan gi 5.0.0 en jp"
+)
+
+# Fungsi untuk membuat pesan rencana update
+def build_plan_message(game, region, installed, audio, routes, unknown_audio):
+    audio_label = ", ".join(label.replace("Audio ", "") for label in sorted(audio)) or "-"
+    message = f"<b>Rencana update {display_title(game, region)}</b>\n"
+    message += f"Terpasang: {installed or 'belum ada'} • Audio: {audio_label}\n"
+    if unknown_audio:
+        message += f"<i>Audio tidak tersedia: {', '.join(unknown_audio)}</i>\n"
+    message += "\n"
+    if not routes:
+        return message + "Versi terpasang sudah yang terbaru.\n"
+
+    for version, route in sorted(routes.items(), key=lambda item: parse_version(item[0])):
+        label = f"{version} (pre-download)" if route.pre_download else version
+        message += f"➡️ <b>{label}</b>: total {format_size(route.size)}"
+        if route.size < route.full_size:
+            message += f" (hemat {format_size(route.full_size - route.size)} dibanding full install)"
+        message += "\n"
+        for step in route.steps:
+            name = f"Full install {step.to_version}" if step.from_version is None else f"Patch {step.from_version} → {step.to_version}"
+            message += f" <i>{name}</i>\n"
+            message += render_message_files(step_packages(step, audio))
+        message += "\n"
+    return message
+
+# Fungsi command untuk menghitung rute download terkecil dari versi terpasang
+async def plan_command(update: Update, context: CallbackContext):
+    arguments = parse_plan_arguments(context.args)
+    if arguments is None:
+        await reply_text(update.message, PLAN_USAGE, parse_mode="HTML")
+        return
+    game, region, installed, requested_audio = arguments
+    try:
+        manifest = await get_game_updates(game, region)
+    except UpstreamError:
+        await reply_text(update.message, UPSTREAM_ERROR_MESSAGE, parse_mode="HTML")
+        return
+    if not manifest.upgrade_steps:
+        await reply_text(update.message, NO_UPDATES_MESSAGE, parse_mode="HTML")
+        return
 
-        # Full Installation
-        message += "- <b>Full Installation</b>\n"
-        grouped_files = {}
-        for file in full_installation_files:
-            version = file['version']
-            if version not in grouped_files:
-                grouped_files[version] = []
-            grouped_files[version].append(file)
+    languages = audio_languages(manifest)
+    audio = frozenset(label for label in requested_audio or DEFAULT_PLAN_AUDIO if label in languages)
+    unknown_audio = [label for label in requested_audio if label not in languages]
+    routes = plan_routes(game, region, manifest, installed, audio)
+    message = build_plan_message(game, region, installed, audio, routes, unknown_audio)
+    for page in paginate_message(message):
+        await reply_text(update.message, page, parse_mode="HTML")
+
+# Snapshot warm start: manifest (isi mentah + hash), validator HTTP, status link dan hasil render disimpan
+# berkala dan saat berhenti, lalu dipulihkan di main() sebelum bot menerima update.
+# Manifest di-parse ulang dari isi mentah saat dipulihkan, jadi perubahan parser tidak
+# memuat struktur lama; hasil render hanya dipakai jika kode bot sama persis.
+SNAPSHOT_FILE = os.environ.get("SNAPSHOT_FILE", "snapshot.json.gz")
+SNAPSHOT_INTERVAL = float(os.environ.get("SNAPSHOT_INTERVAL", "300"))
+SNAPSHOT_MAX_AGE = float(os.environ.get("SNAPSHOT_MAX_AGE", "86400"))
+# Naikkan jika format snapshot berubah
+SNAPSHOT_VERSION = 2
+
+# Statistik warm start dan waktu sampai balasan pertama
+class StartupStats:
+    def __init__(self):
+        self.restored_manifests = 0
+        self.restored_renders = 0
+        self.snapshot_age = None
+        self.first_reply = None
+
+    def stats(self):
+        stats = {'snapshot_manifests': self.restored_manifests, 'snapshot_renders': self.restored_renders}
+        if self.snapshot_age is not None:
+            stats['snapshot_age_seconds'] = round(self.snapshot_age)
+        if self.first_reply is not None:
+            stats['first_reply_seconds'] = round(self.first_reply, 3)
+        return stats
+
+STARTUP = StartupStats()
+
+# Fungsi untuk mencatat jeda dari mulai proses sampai balasan pertama terkirim (sekali saja)
+def record_first_reply():
+    if STARTUP.first_reply is None:
+        STARTUP.first_reply = time.monotonic() - STARTED_AT
+        logger.info(
+            "Balasan pertama %.2f detik setelah start (%d manifest dari snapshot)",
+            STARTUP.first_reply, STARTUP.restored_manifests,
+        )
 
-        for version, files in grouped_files.items():
-            message += f" <b>Version {version}</b>\n"
-            for file in files:
-                message += f"  <a href=\"{file['url']}\">{file['type']}</a> ({file['size']}) \n"
-            message += "\n"
+# Fungsi untuk mendapatkan tanda tangan kode bot (hasil render lama tidak dipakai jika kode berubah)
+@functools.lru_cache(maxsize=None)
+def code_signature():
+    with open(os.path.abspath(__file__), "rb") as file:
+        return payload_hash(file.read())
+
+# Fungsi untuk membuat isi snapshot dari state di memori
+def build_snapshot():
+    manifests = []
+    for url, manifest, age in MANIFEST_CACHE.export():
+        body = _manifest_payloads.get(url)
+        if url not in MANIFEST_ENDPOINTS or body is None or payload_hash(body) != manifest.content_hash:
+            continue
+        game, region = MANIFEST_ENDPOINTS[url]
+        validators = _fetch_validators.get(url)
+        manifests.append({
+            'game': game.key,
+            'region': region,
+            'url': url,
+            'age': age,
+            'content_hash': manifest.content_hash,
+            'payload': body.decode(),
+            'validators': list(validators) if validators is not None else None,
+        })
+    # Hanya hasil render yang sesuai dengan status link saat ini (sama dengan yang ikut disimpan)
+    rendered = [
+        [game_key, region, item.content_hash, list(item.pages), item.timestamped]
+        for (game_key, region), item in _rendered_updates.items()
+        if item.links == LINK_VERIFIER.generation
+    ]
+    return {
+        'version': SNAPSHOT_VERSION,
+        'code': code_signature(),
+        'saved_at': time.time(),
+        'manifests': manifests,
+        'rendered': rendered,
+        'links': LINK_VERIFIER.export(),
+    }
+
+# Fungsi untuk menulis snapshot secara atomik (gzip, file sementara lalu rename)
+def write_snapshot(snapshot, file_path=SNAPSHOT_FILE):
+    temp_path = f"{file_path}.tmp"
+    with gzip.open(temp_path, "wt", compresslevel=6) as file:
+        json.dump(snapshot, file, separators=(',', ':'))
+    os.replace(temp_path, file_path)
+
+# Fungsi untuk memulihkan state dari snapshot; dipanggil sekali sebelum bot berjalan
+def restore_snapshot(file_path=SNAPSHOT_FILE):
+    try:
+        with gzip.open(file_path, "rt") as file:
+            snapshot = json.load(file)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError) as error:
+        logger.warning("Snapshot %s tidak bisa dibaca: %r", file_path, error)
+        return
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        logger.info("Snapshot versi %s diabaikan (versi sekarang %d)", snapshot.get('version'), SNAPSHOT_VERSION)
+        return
+    elapsed = max(0.0, time.time() - snapshot['saved_at'])
+    if elapsed > SNAPSHOT_MAX_AGE:
+        logger.info("Snapshot diabaikan, sudah %s", format_age(elapsed))
+        return
 
-        # Old Patches
-        message += "- <b>Download From Patch</b>\n"
-        if old_patches:
-            for patch in old_patches:
-                message += f" <b>Version {patch['version']}</b>\n"
-                for file in patch['game_pkgs']:
-                    message += f"  <a href=\"{file['url']}\">{file['type']}</a> ({file['size']}) \n"
-                message += "\n"
-        else:
-            message += " No old patches available.\n\n"
-
-        # New Patches
-        message += "***********\n"
-        if new_patches:
-            for patch in new_patches:
-                message += f" <b>Version {patch['version']}</b>\n"
-                for file in patch['game_pkgs']:
-                    message += f"  <a href=\"{file['url']}\">{file['type']}</a> ({file['size']}) \n"
-                message += "\n"
+    restored = set()
+    for entry in snapshot['manifests']:
+        url = entry['url']
+        age = entry['age'] + elapsed
+        if url not in MANIFEST_ENDPOINTS or age > SNAPSHOT_MAX_AGE:
+            continue
+        body = entry['payload'].encode()
+        if payload_hash(body) != entry['content_hash']:
+            continue
+        game, region = MANIFEST_ENDPOINTS[url]
+        try:
+            data = json.loads(body)
+            manifest = parse_manifest(game, data, entry['content_hash'])
+        except (ValueError, LookupError, TypeError, AttributeError) as error:
+            logger.warning("Manifest %s %s di snapshot tidak valid: %r", game.key, region, error)
+            continue
+        MANIFEST_CACHE.restore(url, manifest, age)
+        _manifest_payloads[url] = body
+        MANIFEST_SIGNATURES[url] = manifest_signature(data)
+        if entry['validators'] is not None:
+            _fetch_validators[url] = FetchValidators(*entry['validators'])
+        restored.add(game.key)
+        STARTUP.restored_manifests += 1
+
+    # Status link dipulihkan sebelum hasil render, karena tanda ⚠️ di render berasal dari status ini
+    LINK_VERIFIER.restore(snapshot['links'], elapsed)
+    if snapshot['code'] == code_signature():
+        for game_key, region, content_hash, pages, timestamped in snapshot['rendered']:
+            if game_key in restored:
+                _rendered_updates.setdefault((game_key, region), RenderedUpdate(
+                    content_hash, tuple(pages), timestamped, LINK_VERIFIER.generation
+                ))
+                STARTUP.restored_renders += 1
+    STARTUP.snapshot_age = elapsed
+    logger.info(
+        "Snapshot dipulihkan: %d manifest, %d hasil render (disimpan %s lalu)",
+        STARTUP.restored_manifests, STARTUP.restored_renders, format_age(elapsed),
+    )
+
+# Fungsi untuk menyimpan snapshot di luar event loop; gagal menyimpan hanya dicatat di log
+async def save_snapshot():
+    if not SNAPSHOT_FILE:
+        return
+    try:
+        await asyncio.to_thread(write_snapshot, build_snapshot())
+    except OSError as error:
+        logger.warning("Gagal menyimpan snapshot: %r", error)
+
+# Fungsi untuk menyimpan snapshot secara berkala, hanya jika isi manifest atau render berubah
+async def save_snapshot_periodically(interval):
+    saved = None
+    while True:
+        await asyncio.sleep(interval)
+        current = (
+            sorted((url, manifest.content_hash) for url, manifest, _ in MANIFEST_CACHE.export()),
+            sorted((key, item.content_hash) for key, item in _rendered_updates.items()),
+        )
+        if current != saved:
+            await save_snapshot()
+            saved = current
+
+async def start_snapshots(app):
+    if SNAPSHOT_FILE and SNAPSHOT_INTERVAL > 0:
+        app.bot_data['snapshot_task'] = asyncio.create_task(save_snapshot_periodically(SNAPSHOT_INTERVAL))
+
+async def stop_snapshots(app):
+    task = app.bot_data.pop('snapshot_task', None)
+    if task is not None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    await save_snapshot()
+
+# Konfigurasi endpoint /metrics lokal (port 0 = nonaktif) dan ringkasan metrik di log
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9108"))
+METRICS_LOG_INTERVAL = float(os.environ.get("METRICS_LOG_INTERVAL", "0"))
+
+METRICS.collect(MANIFEST_CACHE.stats, group="cache")
+METRICS.collect(FETCH_STATS.stats)
+METRICS.collect(HTML_WRITER.stats)
+METRICS.collect(OUTBOUND.stats)
+METRICS.collect(THROTTLE.stats)
+METRICS.collect(breaker_stats)
+METRICS.collect(LINK_VERIFIER.stats)
+METRICS.collect(STARTUP.stats)
+
+# Fungsi untuk melayani satu koneksi HTTP ke endpoint metrik
+async def serve_metrics(reader, writer):
+    try:
+        request_line = await reader.readline()
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = request_line.decode("latin-1").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+            status, body = "200 OK", METRICS.render().encode()
         else:
-            current_time = datetime.now().strftime("%d-%m-%Y %H:%M:%S")
-            message += f"Update terakhir pada: {current_time}\n\n"
-
-        # Tambahkan tombol kembali ke daftar server
-        keyboard = [[InlineKeyboardButton("🔙 Kembali", callback_data='honkai_back')]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-
-        await query.message.edit_text(message, parse_mode="HTML", reply_markup=reply_markup)
+            status, body = "404 Not Found", b"not found\n"
+        writer.write(
+            f"HTTP/1.1 {status}\r\n"
+            "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+# Fungsi untuk menulis ringkasan metrik ke log secara berkala
+async def log_metrics_summary(interval):
+    while True:
+        await asyncio.sleep(interval)
+        logger.info("Ringkasan metrik:\n  %s", "\n  ".join(METRICS.summary() or ["(belum ada data)"]))
+
+async def start_metrics(app):
+    if METRICS_PORT > 0:
+        server = await asyncio.start_server(serve_metrics, METRICS_HOST, METRICS_PORT)
+        app.bot_data['metrics_server'] = server
+        logger.info("Metrik tersedia di http://%s:%d/metrics", METRICS_HOST, METRICS_PORT)
+    if METRICS_LOG_INTERVAL > 0:
+        app.bot_data['metrics_log_task'] = asyncio.create_task(log_metrics_summary(METRICS_LOG_INTERVAL))
+
+async def stop_metrics(app):
+    task = app.bot_data.pop('metrics_log_task', None)
+    if task is not None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    server = app.bot_data.pop('metrics_server', None)
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+
+# API JSON lokal (read-only) di atas cache manifest yang sama dengan bot, port 0 = nonaktif
+#   GET /api                               daftar game, server dan URL
+#   GET /api/<game>[/<server>]/latest      versi terbaru
+#   GET /api/<game>[/<server>]/patches     daftar patch beserta paketnya
+#   GET /api/<game>[/<server>]/packages    semua paket (full install, patch, langkah upgrade)
+# Isi respons hanya bergantung pada isi manifest, jadi ETag (kuat) dan versi gzip-nya
+# dibuat sekali per isi manifest lalu dipakai ulang untuk semua permintaan.
+API_HOST = os.environ.get("API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("API_PORT", "9109"))
+API_VIEWS = ('latest', 'patches', 'packages')
+API_MAX_HEADER_LINES = 100
+# Koneksi keep-alive yang menganggur ditutup setelah jeda ini (detik)
+API_IDLE_TIMEOUT = 30.0
+API_REASONS = {200: "OK", 304: "Not Modified", 404: "Not Found", 405: "Method Not Allowed",
+               500: "Internal Server Error", 503: "Service Unavailable"}
+
+# Respons yang sudah di-serialize: body JSON, body gzip, dan ETag masing-masing
+ApiBody = namedtuple('ApiBody', ['content_hash', 'body', 'gzip_body', 'etag', 'gzip_etag'])
+
+_api_bodies = {}
+
+# Fungsi untuk mengubah daftar paket menjadi data JSON
+def api_packages(packages):
+    return [{'type': file.type, 'url': file.url, 'size': file.size, 'md5': file.md5} for file in packages]
+
+def api_patch(patch, section):
+    return {
+        'version': patch.version,
+        'section': section,
+        'size': sum(file.size for file in patch.game_pkgs + patch.audio_pkgs),
+        'game_pkgs': api_packages(patch.game_pkgs),
+        'audio_pkgs': api_packages(patch.audio_pkgs),
+    }
+
+# Fungsi untuk membuat data JSON sebuah view dari manifest
+def api_view(game, region, view, manifest):
+    data = {
+        'game': game.key,
+        'region': region,
+        'title': display_title(game, region),
+        'version': manifest.latest_version,
+        'content_hash': manifest.content_hash,
+    }
+    patches = [api_patch(patch, 'new') for patch in manifest.new_patches]
+    patches += [api_patch(patch, 'old') for patch in manifest.old_patches]
+    if view == 'latest':
+        data['pre_download'] = any(step.pre_download for step in manifest.upgrade_steps)
+        data['patch_versions'] = [patch['version'] for patch in patches]
+    elif view == 'patches':
+        data['patches'] = patches
     else:
-        keyboard = [[InlineKeyboardButton("🔙 Kembali", callback_data='honkai_back')]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-
-        await query.message.edit_text("Tidak ada pembaruan tersedia saat ini.", parse_mode="HTML", reply_markup=reply_markup)
-
-
+        data['full'] = [
+            {'version': release.version, 'packages': api_packages(release.packages)}
+            for release in manifest.releases
+        ]
+        data['patches'] = patches
+        data['upgrade_steps'] = [
+            {
+                'from_version': step.from_version,
+                'to_version': step.to_version,
+                'pre_download': step.pre_download,
+                'game_pkgs': api_packages(step.game_pkgs),
+                'audio_pkgs': api_packages(step.audio_pkgs),
+            }
+            for step in manifest.upgrade_steps
+        ]
+    return data
+
+# Fungsi untuk mendapatkan body respons; hanya di-serialize ulang jika isi manifest berubah
+def api_body(game, region, view, manifest):
+    key = (game.key, region, view)
+    cached = _api_bodies.get(key)
+    if cached is not None and cached.content_hash == manifest.content_hash:
+        return cached
+    body = json.dumps(api_view(game, region, view, manifest), ensure_ascii=False, separators=(',', ':')).encode()
+    digest = payload_hash(body)
+    cached = _api_bodies[key] = ApiBody(
+        content_hash=manifest.content_hash,
+        body=body,
+        gzip_body=gzip.compress(body, compresslevel=9, mtime=0),
+        etag=f'"{digest}"',
+        gzip_etag=f'"{digest}-gzip"',
+    )
+    return cached
+
+# Fungsi untuk mengecek header If-None-Match terhadap ETag
+def etag_matches(header, etag):
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+def api_json(status, payload):
+    return status, {'Content-Type': "application/json; charset=utf-8"}, json.dumps(payload).encode()
+
+# Fungsi untuk menjawab satu permintaan API: mengembalikan (status, header, body)
+async def api_response(method, path, headers):
+    if method not in ("GET", "HEAD"):
+        return api_json(405, {'error': "method tidak didukung"})
+    parts = [part for part in urlsplit(path).path.split("/") if part]
+    if parts == ["api"]:
+        return api_json(200, {
+            'games': [
+                {
+                    'game': game.key,
+                    'title': game.title,
+                    'regions': list(game.endpoints),
+                    'views': [
+                        f"/api/{game.key}/{region}/{view}" if has_regions(game) else f"/api/{game.key}/{view}"
+                        for region in game.endpoints for view in API_VIEWS
+                    ],
+                }
+                for game in GAMES.values()
+            ],
+        })
+    if len(parts) not in (3, 4) or parts[0] != "api" or parts[1] not in GAMES or parts[-1] not in API_VIEWS:
+        return api_json(404, {'error': "tidak ditemukan"})
+    game = GAMES[parts[1]]
+    view = parts[-1]
+    region = find_region(game, parts[2]) if len(parts) == 4 else default_region(game)
+    if region in (None, ALL_REGIONS):
+        return api_json(404, {'error': f"server tidak dikenal, pilih: {', '.join(game.endpoints)}"})
+
+    try:
+        manifest = await get_game_updates(game, region)
+    except UpstreamError:
+        return api_json(503, {'error': "server API upstream bermasalah dan belum ada data tersimpan"})
+    cached = api_body(game, region, view, manifest)
+    use_gzip = "gzip" in headers.get('accept-encoding', "")
+    etag = cached.gzip_etag if use_gzip else cached.etag
+    response_headers = {
+        'Content-Type': "application/json; charset=utf-8",
+        'ETag': etag,
+        'Cache-Control': "no-cache",
+        'Vary': "Accept-Encoding",
+    }
+    degraded_age = MANIFEST_CACHE.degraded_age(game.endpoints[region])
+    if degraded_age is not None:
+        response_headers['X-Data-Age'] = str(int(degraded_age))
+    if etag_matches(headers.get('if-none-match'), etag):
+        return 304, response_headers, b""
+    if use_gzip:
+        response_headers['Content-Encoding'] = "gzip"
+        return 200, response_headers, cached.gzip_body
+    return 200, response_headers, cached.body
+
+_api_connections = set()
+
+# Fungsi untuk melayani satu koneksi HTTP/1.1 (keep-alive) ke API lokal
+async def serve_api(reader, writer):
+    _api_connections.add(writer)
+    try:
+        while True:
+            request_line = await asyncio.wait_for(reader.readline(), API_IDLE_TIMEOUT)
+            if not request_line.strip():
+                break
+            headers = {}
+            for _ in range(API_MAX_HEADER_LINES):
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            parts = request_line.decode("latin-1").split()
+            if len(parts) != 3:
+                break
+            method, path, _ = parts
+            view = path.rstrip("/").rsplit("/", 1)[-1] if path.startswith("/api/") else "index"
+            with HANDLER_SECONDS.time(handler="api", mode="fresh"):
+                try:
+                    status, response_headers, body = await api_response(method, path, headers)
+                except Exception:
+                    logger.exception("Error saat menjawab API %s", path)
+                    status, response_headers, body = api_json(500, {'error': "internal error"})
+            API_REQUESTS.inc(view=view if view in API_VIEWS else "other", status=status)
+            keep_alive = headers.get('connection', "").lower() != "close"
+            head = f"HTTP/1.1 {status} {API_REASONS.get(status, 'OK')}\r\n"
+            head += "".join(f"{name}: {value}\r\n" for name, value in response_headers.items())
+            head += f"Content-Length: {len(body)}\r\n"
+            head += "Connection: keep-alive\r\n" if keep_alive else "Connection: close\r\n"
+            writer.write(head.encode("latin-1") + b"\r\n" + (b"" if method == "HEAD" else body))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+        pass
+    finally:
+        _api_connections.discard(writer)
+        writer.close()
+
+async def start_api(app):
+    if API_PORT > 0:
+        app.bot_data['api_server'] = await asyncio.start_server(serve_api, API_HOST, API_PORT)
+        logger.info("API JSON tersedia di http://%s:%d/api", API_HOST, API_PORT)
+
+async def stop_api(app):
+    server = app.bot_data.pop('api_server', None)
+    if server is not None:
+        server.close()
+        for writer in list(_api_connections):
+            writer.close()
+        await server.wait_closed()
+
+# Fungsi yang dijalankan saat bot mulai
+async def on_startup(app):
+    OUTBOUND.bot = app.bot
+    await start_metrics(app)
+    await start_api(app)
+    await start_background_poller(app)
+    await start_link_verifier(app)
+    await start_snapshots(app)
+
+# Fungsi yang dijalankan saat bot berhenti
+async def on_shutdown(app):
+    await stop_background_poller(app)
+    await stop_link_verifier(app)
+    await stop_snapshots(app)
+    await stop_api(app)
+    await stop_metrics(app)
+    await HTML_WRITER.stop()
+    HISTORY.close()
+    await OUTBOUND.stop()
+    await close_http_client(app)
+
+# Fungsi command untuk menampilkan statistik cache manifest
+async def stats_command(update: Update, context: CallbackContext):
+    stats = MANIFEST_CACHE.stats()
+    stats.update(FETCH_STATS.stats())
+    stats.update(OUTBOUND.stats())
+    stats.update(THROTTLE.stats())
+    stats.update(HTML_WRITER.stats())
+    stats.update(breaker_stats())
+    stats.update(LINK_VERIFIER.stats())
+    stats.update(STARTUP.stats())
+    message = "<b>Statistik Cache Manifest</b>\n\n"
+    message += "".join(f" {name}: {value}\n" for name, value in stats.items())
+    await reply_text(update.message, message, parse_mode="HTML")
+
+# Mode verify (tanpa Telegram): cek arsip hasil download di sebuah direktori terhadap md5 manifest
+#   python3 bot.py verify gi /mnt/mirror/genshin
+#   python3 bot.py verify honkai /mnt/mirror/bh3 --server Japan --jobs 4
+VERIFY_CHUNK_SIZE = 8 * 1048576
+VERIFY_CACHE_FILE = os.environ.get("VERIFY_CACHE_FILE", "verify_cache.json")
+
+# Fungsi untuk mengumpulkan file yang diharapkan di mirror: nama file -> Package (yang punya md5)
+def manifest_files(manifest):
+    packages = [file for release in manifest.releases for file in release.packages]
+    for patch in manifest.old_patches + manifest.new_patches:
+        packages += patch.game_pkgs + patch.audio_pkgs
+    for step in manifest.upgrade_steps:
+        packages += step.game_pkgs + step.audio_pkgs
+    return {
+        unquote(os.path.basename(urlsplit(file.url).path)): file
+        for file in packages if file.md5
+    }
+
+# Fungsi untuk menghitung md5 sebuah file dengan buffer besar (dijalankan di process pool)
+def file_md5(path, chunk_size=VERIFY_CHUNK_SIZE):
+    digest = hashlib.md5(usedforsecurity=False)
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as file:
+        while length := file.readinto(buffer):
+            digest.update(view[:length])
+    return digest.hexdigest()
+
+# Cache hasil hash per file (path absolut -> [ukuran, mtime_ns, md5]); file yang tidak berubah
+# sejak verifikasi sebelumnya tidak di-hash ulang
+class VerifyCache:
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path) as file:
+                self.entries = json.load(file)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, path, stat):
+        entry = self.entries.get(path)
+        if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+        return None
+
+    def put(self, path, stat, md5):
+        self.entries[path] = [stat.st_size, stat.st_mtime_ns, md5]
+
+    # Disimpan secara atomik setelah setiap file agar verifikasi yang terputus bisa dilanjutkan
+    def save(self):
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump(self.entries, file)
+        os.replace(temp_path, self.path)
+
+# Fungsi untuk mengambil manifest terbaru sekali saja (tanpa cache, riwayat, atau notifikasi)
+async def fetch_manifest_once(game, region):
+    try:
+        body, _ = await fetch_payload(game.endpoints[region], conditional=False)
+        return parse_manifest(game, json.loads(body), payload_hash(body))
+    finally:
+        await close_http_client(None)
+
+# Fungsi untuk memverifikasi isi direktori; mengembalikan daftar (nama file, status)
+def verify_directory(manifest, directory, jobs=None, cache=None, progress=print):
+    expected = manifest_files(manifest)
+    results = []
+    pending = {}
+    for name, package in sorted(expected.items()):
+        path = os.path.abspath(os.path.join(directory, name))
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            results.append((name, "tidak ada"))
+            continue
+        if stat.st_size != package.size:
+            results.append((name, f"ukuran berbeda ({stat.st_size} B, manifest {package.size} B)"))
+            continue
+        md5 = cache.get(path, stat) if cache is not None else None
+        if md5 is not None:
+            results.append((name, "OK" if md5 == package.md5.lower() else "md5 berbeda"))
+            continue
+        pending[name] = (path, stat, package)
+
+    total = sum(stat.st_size for _, stat, _ in pending.values())
+    done = 0
+    started = time.monotonic()
+    if pending:
+        progress(f"Menghitung md5 {len(pending)} file ({format_size(total)}), "
+                 f"{len(expected) - len(pending)} file dari cache / dilewati")
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        # File terbesar lebih dulu agar semua worker selesai di waktu yang berdekatan
+        futures = {
+            pool.submit(file_md5, path): name
+            for name, (path, stat, _) in sorted(pending.items(), key=lambda item: -item[1][1].st_size)
+        }
+        for count, future in enumerate(as_completed(futures), start=1):
+            name = futures[future]
+            path, stat, package = pending[name]
+            try:
+                md5 = future.result()
+            except OSError as error:
+                results.append((name, f"gagal dibaca ({error.strerror})"))
+                continue
+            if cache is not None:
+                cache.put(path, stat, md5)
+                cache.save()
+            status = "OK" if md5 == package.md5.lower() else "md5 berbeda"
+            results.append((name, status))
+            done += stat.st_size
+            speed = done / max(time.monotonic() - started, 1e-9)
+            progress(f"[{count}/{len(pending)}] {format_size(done)} / {format_size(total)} "
+                     f"({format_size(speed)}/s) {name}: {status}")
+    return sorted(results)
+
+# Fungsi utama mode verify; kode keluar 1 jika ada file yang rusak
+def verify_main(argv):
+    parser = argparse.ArgumentParser(prog="bot.py verify", description="Verifikasi arsip download terhadap md5 manifest")
+    parser.add_argument("game", choices=sorted(GAMES))
+    parser.add_argument("directory")
+    parser.add_argument("--server", help="server (untuk game dengan beberapa server)")
+    parser.add_argument("--manifest", help="pakai file JSON manifest ini, bukan mengambil dari API")
+    parser.add_argument("--jobs", type=int, default=None, help="jumlah proses hash (default: jumlah CPU)")
+    parser.add_argument("--cache", default=VERIFY_CACHE_FILE, help="file cache hasil hash")
+    parser.add_argument("--no-cache", action="store_true", help="hash ulang semua file")
+    args = parser.parse_args(argv)
+
+    game = GAMES[args.game]
+    region = find_region(game, args.server) if args.server else default_region(game)
+    if region in (None, ALL_REGIONS):
+        parser.error(f"server tidak dikenal, pilih: {', '.join(game.endpoints)}")
+    if args.manifest:
+        with open(args.manifest, "rb") as file:
+            body = file.read()
+        manifest = parse_manifest(game, json.loads(body), payload_hash(body))
+    else:
+        manifest = asyncio.run(fetch_manifest_once(game, region))
+
+    cache = None if args.no_cache else VerifyCache(args.cache)
+    results = verify_directory(manifest, args.directory, jobs=args.jobs, cache=cache,
+                               progress=functools.partial(print, file=sys.stderr, flush=True))
+    broken = [(name, status) for name, status in results if status not in ("OK", "tidak ada")]
+    missing = sum(status == "tidak ada" for _, status in results)
+    for name, status in broken:
+        print(f"{name}: {status}")
+    print(f"{display_title(game, region)} {manifest.latest_version}: "
+          f"{len(results) - len(broken) - missing} OK, {len(broken)} rusak, {missing} tidak ada di direktori")
+    return 1 if broken else 0
+
+# Konfigurasi mode bot: "polling" (bawaan) atau "webhook"
+BOT_MODE = os.environ.get("BOT_MODE", "polling")
+WEBHOOK_LISTEN = os.environ.get("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.environ.get("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.environ.get("WEBHOOK_PATH", "telegram")
+WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET")
+WEBHOOK_URL = os.environ.get("WEBHOOK_URL")
+MAX_CONCURRENT_UPDATES = int(os.environ.get("MAX_CONCURRENT_UPDATES", "64"))
+# Alamat Bot API alternatif (misalnya server Telegram tiruan untuk pengujian lokal)
+TELEGRAM_BASE_URL = os.environ.get("TELEGRAM_BASE_URL")
+
+# Fungsi untuk membuat aplikasi bot
+def build_application(token):
+    builder = (
+        Application.builder()
+        .token(token)
+        .concurrent_updates(MAX_CONCURRENT_UPDATES)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+    )
+    if TELEGRAM_BASE_URL:
+        builder = builder.base_url(f"{TELEGRAM_BASE_URL}/bot").base_file_url(f"{TELEGRAM_BASE_URL}/file/bot")
+    return builder.build()
+
+# Fungsi untuk mendaftarkan semua handler
+def register_handlers(app):
+    for game in GAMES.values():
+        app.add_handler(CommandHandler(game.command, throttled(game_update_command(game), replayable=True)))
+        if has_regions(game):
+            app.add_handler(CallbackQueryHandler(throttled(region_callback, replayable=True), pattern=f"^{game.key}_"))
+    app.add_handler(CallbackQueryHandler(throttled(page_callback, replayable=True), pattern='^page_'))
+    app.add_handler(InlineQueryHandler(inline_query))
+    app.add_handler(CommandHandler("subscribe", throttled(subscribe_command)))
+    app.add_handler(CommandHandler("unsubscribe", throttled(unsubscribe_command)))
+    app.add_handler(CommandHandler("history", throttled(history_command)))
+    app.add_handler(CommandHandler("diff", throttled(diff_command)))
+    app.add_handler(CommandHandler("plan", throttled(plan_command)))
+    app.add_handler(CommandHandler("stats", throttled(stats_command)))
 
 # Fungsi utama bot
 def main():
-    BOT_TOKEN = "BOT TOKEN KAMU"
-    app = Application.builder().token(BOT_TOKEN).build()
-    app.add_handler(CommandHandler("updateGI", update_gi_command))
-    app.add_handler(CommandHandler("updateZZZ", update_zzz_command))
-    app.add_handler(CommandHandler("updateHSR", update_hsr_command))
-    app.add_handler(CommandHandler("updatehonkai", update_honkai_command))
-    app.add_handler(CallbackQueryHandler(honkai_server_callback, pattern='^honkai_'))
-    app.run_polling()
+    BOT_TOKEN = os.environ.get("BOT_TOKEN", "BOT TOKEN KAMU")
+    app = build_application(BOT_TOKEN)
+    register_handlers(app)
+    # Warm start: jawab dari data terakhir sejak update pertama
+    if SNAPSHOT_FILE:
+        restore_snapshot()
+
+    # Saat berhenti (SIGINT/SIGTERM), update yang sedang diproses diselesaikan dulu
+    # sebelum on_shutdown menutup antrean pesan dan koneksi
+    if BOT_MODE == "webhook":
+        app.run_webhook(
+            listen=WEBHOOK_LISTEN,
+            port=WEBHOOK_PORT,
+            url_path=WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET,
+            webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{WEBHOOK_PATH}" if WEBHOOK_URL else None,
+            max_connections=min(MAX_CONCURRENT_UPDATES, 100),
+        )
+    else:
+        app.run_polling()
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["verify"]:
+        sys.exit(verify_main(sys.argv[2:]))
     main()